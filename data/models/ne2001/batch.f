@@ -0,0 +1,60 @@
+c==============================================================================
+      subroutine dm_batch(n,dkpc,l,b,dms,ip,lip)
+c==============================================================================
+c
+c     Routine to calculate the dispersion measure for an array of n sources
+c     given their distances (kpc), galactic longitudes l and latitudes b
+c     (degrees) in a single call, rather than one call per source. Uses
+c     the NE2001 model (dmod = 4). The DMs (cm-3 pc) are returned in dms.
+c
+      implicit none
+c
+c     passed down variables
+c
+      integer n, lip
+      real dkpc(n), l(n), b(n), dms(n)
+      character ip*(*)
+c
+c     local variables...
+c
+      integer i
+      real sm
+c
+c     functions
+c
+      real dm
+c
+      do i = 1, n
+         dms(i) = dm(dkpc(i),l(i),b(i),4,sm,ip,lip)
+      end do
+      end
+c==============================================================================
+      subroutine smtau_batch(n,dkpc,l,b,sms,smtaus,ip,lip)
+c==============================================================================
+c
+c     Routine to calculate the scattering measures for an array of n sources
+c     given their distances (kpc), galactic longitudes l and latitudes b
+c     (radians) in a single call. Returns the uniformly weighted scattering
+c     measure in sms and the pulse broadening weighted one in smtaus.
+c
+      implicit none
+c
+c     passed down variables
+c
+      integer n, lip
+      real dkpc(n), l(n), b(n), sms(n), smtaus(n)
+      character ip*(*)
+c
+c     local variables...
+c
+      integer i
+      real dmpsr, dist, smtheta, smiso
+      character*1 limit
+c
+      do i = 1, n
+         dmpsr = 0.0
+         dist = dkpc(i)
+         call dmdsm(l(i),b(i),-1,dmpsr,dist,limit,sms(i),smtaus(i),
+     .              smtheta,smiso,ip,lip)
+      end do
+      end
@@ -86,7 +86,8 @@ def calc_max_offset(n, fwhm):
 
 
 def int_pro_random(shape=(1, 1), pattern='perfect', fwhm=2, max_offset=None,
-                   central_freq=1400, beam_array=None, pixel_scale=None):
+                   central_freq=1400, beam_array=None, pixel_scale=None,
+                   rng=None):
     """Calculate the intensity profile in random places of a beam pattern.
 
     Args:
@@ -97,15 +98,17 @@ def int_pro_random(shape=(1, 1), pattern='perfect', fwhm=2, max_offset=None,
         central_freq (float): Central frequency [MHz].
         beam_array (array): Numpy array of beam pattern
         pixel_scale (float): Degrees per pixel of beam_array [degree]
+        rng (Generator): Random number generator. Defaults to a new one.
 
     Returns:
         array, array: intensity, offset from beam [degree]
 
     """
+    rng = np.random.default_rng(rng)
     offset = fwhm/2  # Radius [deg]
 
     # Take a random location in the 2D beampattern
-    offset *= np.sqrt(np.random.random(shape).astype(np.float32))
+    offset *= np.sqrt(rng.random(shape).astype(np.float32))
 
     # Convert max offset to units of the radius
     if max_offset is not None:
@@ -143,8 +146,8 @@ def int_pro_random(shape=(1, 1), pattern='perfect', fwhm=2, max_offset=None,
     # Use an array of the beam pattern
     elif beam_array is not None:
         b_shape = beam_array.shape
-        ran_x = np.random.randint(0, b_shape[0], shape)
-        ran_y = np.random.randint(0, b_shape[1], shape)
+        ran_x = rng.integers(0, b_shape[0], shape)
+        ran_y = rng.integers(0, b_shape[1], shape)
         int_pro = beam_array[ran_x, ran_y]
         x_offset = (ran_x-(b_shape[0]/2)) * pixel_scale
         y_offset = (ran_y-(b_shape[1]/2)) * pixel_scale
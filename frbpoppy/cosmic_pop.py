@@ -1,6 +1,9 @@
 """Class to generate a cosmic population of FRBs."""
 import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
+from frbpoppy.frbs import FRBs
 from frbpoppy.misc import pprint
 from frbpoppy.number_density import NumberDensity
 from frbpoppy.population import Population
@@ -12,17 +15,37 @@ import frbpoppy.si_dists as sid
 import frbpoppy.lum_dists as ld
 import frbpoppy.galacticops as go
 import frbpoppy.precalc as pc
+import frbpoppy.sky_pixels as sp
+from frbpoppy.ragged import Ragged
 
 
 class CosmicPopulation(Population):
     """Generate a cosmic FRB population."""
 
+    # Generating stages in the order in which they're run, each with the
+    # stages whose output it depends upon
+    stages = OrderedDict([('index', ()),
+                          ('dist', ()),
+                          ('time', ('dist',)),
+                          ('direction', ()),
+                          ('gal_coords', ('dist', 'direction')),
+                          ('dm_mw', ('direction',)),
+                          ('dm_igm', ('dist',)),
+                          ('dm_host', ('dist',)),
+                          ('dm', ('dm_mw', 'dm_igm', 'dm_host')),
+                          ('w', ('dist', 'time')),
+                          ('si', ('time',)),
+                          ('lum', ('time',))])
+
     def __init__(self,
                  n_srcs=1e4,
                  n_days=1,
                  name='cosmic',
                  repeaters=False,
-                 generate=False):
+                 generate=False,
+                 seed=None,
+                 n_threads=1,
+                 ragged=False):
         """Generate a popuation of FRBs.
 
         Args:
@@ -31,6 +54,12 @@ class CosmicPopulation(Population):
             name (str): Population name.
             repeaters (bool): Whether to generate a repeater population.
             generate (bool): Whether to create a population.
+            seed (int): Seed from which to derive random streams. Defaults
+                to fresh entropy from the operating system.
+            n_threads (int): Number of threads over which to spread
+                generating stages which don't depend on each other.
+            ragged (bool): Whether to store the bursts of repeaters flat,
+                with offsets per source, rather than in NaN-padded arrays.
 
         Returns:
             Population: Population of FRBs
@@ -48,8 +77,21 @@ class CosmicPopulation(Population):
         self.n_srcs = int(n_srcs)
         self.n_days = n_days
         self.repeaters = repeaters
+        self.ragged = ragged
         self.shape = (self.n_srcs,)
 
+        # Random streams per stage, set upon generating
+        self.seed = seed
+        self.seed_seq = None
+        self.rngs = None
+        self.n_threads = n_threads
+
+        # Stages which need to be (re)generated
+        self.dirty = set(self.stages)
+
+        # Surveys towards whose detection limits to sample luminosities
+        self.flux_limit_surveys = None
+
         # If wanting repeaters
         if self.repeaters:
             self.set_time()
@@ -104,6 +146,8 @@ class CosmicPopulation(Population):
             alpha (float): Desired log N log S slope for a perfect,
                 non-cosmological population.
         """
+        self.invalidate('dist')
+
         # Option to use your own model
         if not isinstance(model, str):
             self.dist_func = lambda: model(**kwargs)
@@ -125,42 +169,102 @@ class CosmicPopulation(Population):
         """Generate source distances."""
         n_model = self.dist_func()
         self.vol_co_max = n_model.vol_co_max
-        self.frbs.z, self.frbs.dist_co = n_model.draw(self.n_srcs)
+
+        # Draw more sources at redshifts at which they could be detected
+        if self.flux_limit_surveys is not None:
+            z, dist_co, self.dist_weight = n_model.draw_tilted(
+                self.n_srcs, self.calc_detectable_fraction,
+                rng=self.rngs['dist'])
+            self.frbs.z, self.frbs.dist_co = z, dist_co
+            return
+
+        self.frbs.z, self.frbs.dist_co = n_model.draw(self.n_srcs,
+                                                      rng=self.rngs['dist'])
+        self.dist_weight = 1
 
     def gen_gal_coords(self):
-        """Generate galactic coordinates."""
-        frbs = self.frbs
-        # Get the proper distance
-        dist_pr = frbs.dist_co/(1+frbs.z)
-        # Convert into galactic coordinates
-        frbs.gx, frbs.gy, frbs.gz = go.lb_to_xyz(frbs.gl, frbs.gb, dist_pr)
+        """Generate galactic coordinates upon first use."""
+        self.frbs.set_lazy(('gx', 'gy', 'gz'), calc_gal_coords)
 
     def set_direction(self, model='uniform', **kwargs):
         """Set the model for generating the directions of the frb sources.
 
         Args:
-            model (str): Choice from ('uniform').
+            model (str): Choice from ('uniform', 'footprint', 'pixels').
         if model == 'uniform':
             min_ra (float): Minimum right ascenion [frac deg].
             max_ra (float): Maximum right ascenion [frac deg].
             min_dec (float): Minimum declination [frac deg].
             max_dec (float): Maximum declination [frac deg].
+        if model == 'footprint':
+            surveys (list): Surveys within whose regions to generate.
+        if model == 'pixels':
+            n_dec (int): Number of rows of equal-area sky pixels.
+            surveys (list): Surveys in whose regions to generate. Defaults
+                to the full sky.
+        if model is a function:
+            f_sky (float): Fraction of the sky it covers. Defaults to 1.
         """
+        self.invalidate('direction')
+        self.sky = None
+
         # Use your own function
         if not isinstance(model, str):
+            self.f_sky = kwargs.pop('f_sky', 1.)
             self.direction_func = lambda: model(**kwargs)
             return
 
         # Or use a uniform distribution
         if model == 'uniform':
-            self.direction_func = lambda: did.uniform(n_srcs=self.n_srcs,
-                                                      **kwargs)
+            self.f_sky = did.sky_fraction(**kwargs)
+            self.direction_func = lambda: did.uniform(
+                n_srcs=self.n_srcs, rng=self.rngs['direction'], **kwargs)
+        # Or only sample within the regions of surveys
+        elif model == 'footprint':
+            surveys = kwargs['surveys']
+            if not isinstance(surveys, (list, tuple)):
+                surveys = [surveys]
+            regions = [s.region_limits() for s in surveys]
+            self.f_sky = did.footprint_fraction(regions)
+            if self.f_sky == 0:
+                names = ', '.join(s.name for s in surveys)
+                raise ValueError(f'Survey regions of {names} cover no sky')
+            self.direction_func = lambda: did.footprint(
+                regions, n_srcs=self.n_srcs, rng=self.rngs['direction'])
+        # Or draw sky pixels, with direction-dependent values per pixel
+        elif model == 'pixels':
+            self.sky = sp.get_sky(kwargs.get('n_dec', 1024))
+            pixels = None
+            self.f_sky = 1.
+            surveys = kwargs.get('surveys')
+            if surveys is not None:
+                if not isinstance(surveys, (list, tuple)):
+                    surveys = [surveys]
+                maps = [s.calc_pixel_maps(self.sky) for s in surveys]
+                pixels = np.flatnonzero(np.any([m['in_region'] for m in maps],
+                                               axis=0)).astype(np.int32)
+                self.f_sky = pixels.size / self.sky.n_pix
+            self.direction_func = lambda: self.sky.draw(
+                self.n_srcs, pixels=pixels, rng=self.rngs['direction'])
         else:
             raise ValueError('set_direction input not recognised')
 
     def gen_direction(self):
         """Generate the direction of frbs."""
         frbs = self.frbs
+
+        # Look up directions of pixel centres, only placing sources within
+        # their pixels when needed
+        if self.sky is not None:
+            frbs.pix = self.direction_func()
+            ra, dec, gl, gb = self.sky.centres()
+            frbs.gl, frbs.gb = gl[frbs.pix], gb[frbs.pix]
+            offsets = self.rngs['direction'].random(2)
+            frbs.pix_jitter = (self.sky.n_dec, *offsets)
+            frbs.set_lazy(('ra', 'dec'), sp.calc_pixel_radec)
+            return
+
+        frbs.pix = None
         # Calculate right ascenion and declination
         frbs.ra, frbs.dec = self.direction_func()
         # Convert to galactic lat/long coordinates
@@ -171,15 +275,24 @@ class CosmicPopulation(Population):
 
         Args:
             model (str): Option of 'ne2001'.
+        if model == 'ne2001':
+            method (str): Table lookup method, either 'nearest' or
+                'bilinear'.
         """
+        self.invalidate('dm_mw')
+
         if not isinstance(model, str):
             self.dm_mw_func = lambda: model(**kwargs)
             return
 
         # Distribution from which to draw dm_mw
         if model == 'ne2001':
-            self.dm_mw_func = lambda: pc.NE2001Table().lookup(self.frbs.gl,
-                                                              self.frbs.gb)
+            def dm_mw():
+                frbs = self.frbs
+                if frbs.pix is not None:
+                    return self.sky.ne2001_dm(**kwargs)[frbs.pix]
+                return pc.NE2001Table().lookup(frbs.gl, frbs.gb, **kwargs)
+            self.dm_mw_func = dm_mw
         else:
             raise ValueError('set_dm_mw input not recognised')
 
@@ -197,6 +310,8 @@ class CosmicPopulation(Population):
             std (float): Spread around the DM-z relationship.
             spread_dist (str): 'normal' or 'lognormal'.
         """
+        self.invalidate('dm_igm')
+
         # Possibility to use your own function
         if not isinstance(model, str):
             self.dm_igm_func = lambda: model(**kwargs)
@@ -204,7 +319,9 @@ class CosmicPopulation(Population):
 
         # Distribution from which to draw intergalactic dm
         if model == 'ioka':
-            self.dm_igm_func = lambda: dmd.ioka(z=self.frbs.z, **kwargs)
+            self.dm_igm_func = lambda: dmd.ioka(z=self.frbs.z,
+                                                rng=self.rngs['dm_igm'],
+                                                **kwargs)
         else:
             raise ValueError('set_dm_igm input not recognised')
 
@@ -224,6 +341,8 @@ class CosmicPopulation(Population):
         if model == 'constant':
             value (float): Value to adopt [pc/cm^3].
         """
+        self.invalidate('dm_host')
+
         if not isinstance(model, str):
             self.dm_host_func = lambda: model(**kwargs)
             return
@@ -232,10 +351,12 @@ class CosmicPopulation(Population):
         if model.startswith('gauss'):
             self.dm_host_func = lambda: dmd.gauss(z=self.frbs.z,
                                                   n_srcs=self.n_srcs,
+                                                  rng=self.rngs['dm_host'],
                                                   **kwargs)
         elif model == 'lognormal':
             self.dm_host_func = lambda: dmd.lognormal(z=self.frbs.z,
                                                       n_srcs=self.n_srcs,
+                                                      rng=self.rngs['dm_host'],
                                                       **kwargs)
         elif model == 'constant':
             self.dm_host_func = lambda: dmd.constant(n_srcs=self.n_srcs,
@@ -255,6 +376,8 @@ class CosmicPopulation(Population):
             igm (bool): Whether to include an IGM component
             host (bool): Whether to include a host galaxy component
         """
+        self.invalidate('dm_mw', 'dm_igm', 'dm_host')
+
         # Which components to include
         self.dm_components = []
         if mw:
@@ -264,16 +387,10 @@ class CosmicPopulation(Population):
         if host:
             self.dm_components.append(self.gen_dm_host)
 
-        # Save those components to execute at a later stage
-        def run_dm():
-            [c() for c in self.dm_components]
-            return self.frbs.dm_mw + self.frbs.dm_igm + self.frbs.dm_host
-
-        self.dm_func = run_dm
-
     def gen_dm(self):
-        """Generate total dispersion measure."""
-        self.frbs.dm = self.dm_func()
+        """Generate total dispersion measure from its components."""
+        frbs = self.frbs
+        frbs.dm = frbs.dm_mw + frbs.dm_igm + frbs.dm_host
 
     def set_w(self, model='uniform', per_source='same', **kwargs):
         """Set intrinsic pulse widths model [ms].
@@ -292,6 +409,8 @@ class CosmicPopulation(Population):
             std (float): Standard deviation pulse width [ms].
 
         """
+        self.invalidate('w')
+
         # Each burst from the same source: same or different widths?
         if per_source == 'same':
             self.w_shape = lambda: self.n_srcs
@@ -316,19 +435,32 @@ class CosmicPopulation(Population):
                     self.w_shape = lambda: self.shape[::-1]
                     self._transpose_w = True
 
-            self.w_func = lambda x: func(shape=x, z=self.frbs.z, **kwargs)
+            self.w_func = lambda x, z: func(shape=x, z=z,
+                                            rng=self.rngs['w'],
+                                            **self.combined_kwargs(kwargs))
         else:
             raise ValueError('set_w input model not recognised')
 
     def gen_w(self):
         """Generate pulse widths [ms]."""
         shape = self.w_shape()
-        self.frbs.w_int, self.frbs.w_arr = self.w_func(shape)
+        z = self.frbs.z
+        per_burst = self.draws_per_burst(shape)
+        if per_burst:
+            z = z[self.frbs.time.rows()]
+        self.frbs.w_int, self.frbs.w_arr = self.w_func(shape, z)
+
+        if per_burst:
+            self.frbs.w_int = self.frbs.time.like(self.frbs.w_int)
+            self.frbs.w_arr = self.frbs.time.like(self.frbs.w_arr)
 
         # From combined distribution inputs
-        if self._transpose_w:
+        if self._transpose_w and not per_burst:
             self.frbs.w_int = self.frbs.w_int.T
             self.frbs.w_arr = self.frbs.w_arr.T
+        elif self.frbs.w_arr.shape[0] == self.n_srcs:
+            # Intrinsic pulse widths can be recovered when needed
+            self.frbs.set_lazy(('w_int', ), calc_w_int)
 
     def set_si(self, model='gauss', per_source='same', **kwargs):
         """Set spectral index model.
@@ -344,6 +476,8 @@ class CosmicPopulation(Population):
             std (float): Standard deviation spectral index
 
         """
+        self.invalidate('si')
+
         # Each burst from the same source: same or different si?
         if per_source == 'same':
             self.si_shape = lambda: self.n_srcs
@@ -365,7 +499,8 @@ class CosmicPopulation(Population):
                     self._transpose_si = True
 
             # Distribution from which to draw spectral indices
-            self.si_func = lambda x: func(shape=x, **kwargs)
+            self.si_func = lambda x: func(shape=x, rng=self.rngs['si'],
+                                          **self.combined_kwargs(kwargs))
         else:
             raise ValueError('set_si input not recognised')
 
@@ -374,7 +509,11 @@ class CosmicPopulation(Population):
         shape = self.si_shape()
         self.frbs.si = self.si_func(shape)
 
-        if self._transpose_si:
+        per_burst = self.draws_per_burst(shape)
+        if per_burst:
+            self.frbs.si = self.frbs.time.like(self.frbs.si)
+
+        if self._transpose_si and not per_burst:
             self.frbs.si = self.frbs.si.T
 
     def set_lum(self, model='powerlaw', per_source='same', **kwargs):
@@ -394,6 +533,8 @@ class CosmicPopulation(Population):
             value (float): Value for standard candle [ergs/s]
 
         """
+        self.invalidate('lum')
+
         # Each burst from the same source: same or different luminosities?
         if per_source == 'same':
             self.lum_shape = lambda: self.n_srcs
@@ -420,21 +561,105 @@ class CosmicPopulation(Population):
                     self._transpose_lum = True
 
             # Distribution from which to draw luminosities
-            self.lum_func = lambda x: func(shape=x, **kwargs)
+            self.lum_func = lambda x: func(shape=x, rng=self.rngs['lum'],
+                                           **self.combined_kwargs(kwargs))
+            self.lum_model = model
+            self.lum_kwargs = kwargs
         else:
             raise ValueError('set_lum input not recognised')
 
+    def set_flux_limit(self, surveys=None):
+        """Only draw sources which surveys could possibly detect.
+
+        Redshifts are drawn more often where sources could be detected, and
+        luminosities only from the part of the luminosity function above the
+        lowest luminosity detectable by any of the surveys, given the
+        redshift, spectral index and pulse width of each source. Each source
+        gets an importance weight correcting for this, honoured when
+        calculating rates and histograms. Rates then converge with far fewer
+        sources. Only for one-off populations with a 'powerlaw' or 'constant'
+        luminosity function.
+
+        Args:
+            surveys (list): Surveys setting the detection limits. Set to None
+                to sample the full luminosity function again.
+        """
+        if surveys is not None and self.repeaters:
+            m = 'Flux limits are currently not implemented for '
+            m += 'RepeaterPopulations'
+            raise ValueError(m)
+        if surveys is not None and not isinstance(surveys, (list, tuple)):
+            surveys = [surveys]
+
+        self.flux_limit_surveys = surveys
+        self.invalidate('dist', 'lum')
+
+        # Luminosities now depend on the properties setting the flux
+        self.stages = self.stages.copy()
+        deps = CosmicPopulation.stages['lum']
+        if surveys is not None:
+            deps += ('dist', 'w', 'si')
+        self.stages['lum'] = deps
+
+    def calc_lum_limit(self, si, z, dist_co, w_arr):
+        """Lowest bolometric luminosity any of the flux limit surveys detects.
+
+        Args:
+            si (array): Spectral index
+            z (array): Redshift
+            dist_co (array): Comoving distance [Gpc]
+            w_arr (array): Pulse width at Earth [ms]
+
+        Returns:
+            array: Minimum bolometric luminosity [ergs/s]
+
+        """
+        return np.min([s.calc_lum_limit(si, z, dist_co, w_arr,
+                                        f_low=self.f_min, f_high=self.f_max)
+                       for s in self.flux_limit_surveys], axis=0)
+
+    def calc_detectable_fraction(self, z, dist_co):
+        """Fraction of luminosities which could be detected at redshifts.
+
+        Calculated for a flat spectrum source with a pulse width of 1 ms, to
+        steer which redshifts to draw more often.
+
+        Args:
+            z (array): Redshift
+            dist_co (array): Comoving distance [Gpc]
+
+        Returns:
+            array: Fraction of the luminosity function
+
+        """
+        lum_min = self.calc_lum_limit(np.zeros_like(z), z, dist_co, 1+z)
+        return ld.fraction_above(lum_min, self.lum_model, **self.lum_kwargs)
+
     def gen_lum(self):
         """Generate luminosities [ergs/s]."""
         shape = self.lum_shape()
+
+        # Only draw detectable luminosities, keeping track of their weights
+        if self.flux_limit_surveys is not None:
+            frbs = self.frbs
+            lum_min = self.calc_lum_limit(frbs.si, frbs.z, frbs.dist_co,
+                                          frbs.w_arr)
+            frbs.lum_bol, frac = ld.above(lum_min, model=self.lum_model,
+                                          shape=shape, rng=self.rngs['lum'],
+                                          **self.lum_kwargs)
+            frbs.weight = frac*self.dist_weight
+            return
+
+        # Luminosities the same for all bursts of a repeater are kept per
+        # source, see FRBs.per_burst
         self.frbs.lum_bol = self.lum_func(shape)
+        self.frbs.weight = None
 
-        # You need multiple luminosities if repeaters
-        if self.repeaters and self.frbs.lum_bol.ndim == 1:
-            repeat_lums = [self.frbs.lum_bol[..., np.newaxis]]*self.shape[1]
-            self.frbs.lum_bol = np.concatenate(repeat_lums, axis=1)
+        per_burst = self.draws_per_burst(shape)
+        if per_burst:
+            self.frbs.lum_bol = self.frbs.time.like(self.frbs.lum_bol)
 
-        if self._transpose_lum:
+        if self._transpose_lum and not per_burst:
             self.frbs.lum_bol = self.frbs.lum_bol.T
 
     def set_time(self, model='regular', **kwargs):
@@ -446,7 +671,8 @@ class CosmicPopulation(Population):
         If model == 'regular':
             rate (float): Number of bursts per day
         If model == 'poisson':
-            rate (float): Expected number of bursts per day
+            rate (float/array): Expected number of bursts per day, per
+                source if an array
         If model == 'clustered':
             r (float): Rate parameter
             k (float): Shape parameter
@@ -455,6 +681,8 @@ class CosmicPopulation(Population):
             period (float): Period of activity cycle (days)
             frac (float): Fraction of activity cycle a source is active
         """
+        self.invalidate('time')
+
         if not isinstance(model, str):
             # These lambda functions look complex, but aren't.
             # They merely stop the function from running immediately
@@ -464,7 +692,7 @@ class CosmicPopulation(Population):
         # Find available distributions
         funcs = [d for d in dir(td) if hasattr(getattr(td, d), '__call__')]
         internal = ['gamma', 'iteratively_gen_times', '_weibull_dist',
-                    '_poisson_dist']
+                    'sorted_uniform', 'Ragged']
         for f in internal:
             funcs.remove(f)
 
@@ -476,6 +704,7 @@ class CosmicPopulation(Population):
             self.time_func = lambda: func(n_srcs=self.n_srcs,
                                           n_days=self.n_days,
                                           z=self.frbs.z,
+                                          rng=self.rngs['time'],
                                           **kwargs)
         else:
             raise ValueError('set_time input not recognised')
@@ -487,23 +716,286 @@ class CosmicPopulation(Population):
             return
 
         pprint('Adding burst times')
-        self.frbs.time = self.time_func()
-        # Set size for all other parameters
-        self.shape = self.frbs.time.shape
+        time = self.time_func()
+        if self.ragged and not isinstance(time, Ragged):
+            time = Ragged.from_padded(time)
+        elif not self.ragged and isinstance(time, Ragged):
+            time = time.to_padded()
+        self.frbs.time = time
+
+        # Set size for all other parameters, a flat one if stored ragged
+        if self.ragged:
+            self.shape = time.values.shape
+        else:
+            self.shape = time.shape
         pprint('Finished adding burst times')
 
+    def draws_per_burst(self, shape):
+        """Whether values drawn in a shape are for ragged bursts.
+
+        Args:
+            shape (tuple): Shape in which values are drawn.
+
+        Returns:
+            bool: Whether values need storing alongside the burst times
+
+        """
+        return isinstance(self.frbs.time, Ragged) and shape == self.shape
+
+    def combined_kwargs(self, kwargs):
+        """Inputs of combined distributions, expanded to ragged bursts.
+
+        Per-source arrays broadcast over padded bursts, but ragged bursts are
+        drawn flat, so each burst needs the value of its source.
+
+        Args:
+            kwargs (dict): Keyword arguments of a distribution.
+
+        Returns:
+            dict: Keyword arguments with a value per burst if ragged
+
+        """
+        if not isinstance(self.frbs.time, Ragged):
+            return kwargs
+        rows = self.frbs.time.rows()
+        return {k: np.asarray(v)[rows]
+                if isinstance(v, (list, np.ndarray)) else v
+                for k, v in kwargs.items()}
+
     def generate(self):
         """Generate a full CosmicPopulation."""
         pprint(f'Generating {self.name} population')
-        self.gen_index()
-        self.gen_dist()
-        self.gen_time()
-        self.gen_direction()
-        self.gen_gal_coords()
-        self.gen_dm()
-        self.gen_w()
-        self.gen_lum()
-        self.gen_si()
+        # Identical to the first chunk of generate_chunks
+        self.set_seed_seq(self.chunk_seed(0, self.get_entropy()))
+        self.gen_all()
+        pprint(f'Finished generating {self.name} population')
+
+    def gen_all(self):
+        """Run all generating functions for the current n_srcs."""
+        self.gen_stages(self.stages)
+        self.dirty = set()
+
+    def gen_stage(self, stage):
+        """Run the generating function of a single stage.
+
+        Args:
+            stage (str): Name of the stage, see CosmicPopulation.stages.
+        """
+        dm_parts = {'dm_mw': self.gen_dm_mw,
+                    'dm_igm': self.gen_dm_igm,
+                    'dm_host': self.gen_dm_host}
+
+        if stage in dm_parts:
+            # Leave out components excluded with set_dm
+            if dm_parts[stage] in self.dm_components:
+                dm_parts[stage]()
+            else:
+                setattr(self.frbs, stage, 0)
+        else:
+            getattr(self, f'gen_{stage}')()
+
+    def gen_stages(self, stages):
+        """Run stages, in order of their dependencies.
+
+        With multiple threads, stages of which all dependencies have been
+        run are generated concurrently. As each stage draws from its own
+        random stream, the outcome doesn't depend on the number of threads.
+
+        Args:
+            stages (iterable): Names of stages, see CosmicPopulation.stages.
+        """
+        todo = [s for s in self.stages if s in stages]
+
+        if self.n_threads <= 1:
+            for stage in todo:
+                self.gen_stage(stage)
+            return
+
+        done = set(self.stages) - set(todo)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.n_threads) as pool:
+            while todo or running:
+                for stage in [s for s in todo
+                              if done.issuperset(self.stages[s])]:
+                    running[pool.submit(self.gen_stage, stage)] = stage
+                    todo.remove(stage)
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    future.result()
+                    done.add(running.pop(future))
+
+    def invalidate(self, *stages):
+        """Mark stages and all stages depending on them as out of date.
+
+        Args:
+            *stages (str): Names of stages, see CosmicPopulation.stages.
+        """
+        todo = list(stages)
+        while todo:
+            stage = todo.pop()
+            if stage in self.dirty:
+                continue
+            self.dirty.add(stage)
+            # Only repeaters have burst times setting the shape of arrays
+            if stage == 'time' and not self.repeaters:
+                continue
+            todo.extend(s for s, deps in self.stages.items() if stage in deps)
+
+    def regenerate(self):
+        """Only regenerate stages which are out of date.
+
+        Any set_* method marks the parameters it affects as out of date,
+        together with those depending on them. Setting a new distance model
+        for instance also requires new burst times, galactic coordinates,
+        DM_IGM, DM_host, total DM and pulse widths. Unaffected parameters
+        keep their values. Populations which haven't been generated yet, or
+        have changed in size, are generated in full.
+        """
+        if (self.rngs is None or self.frbs.index is None or
+                len(self.frbs.index) != self.n_srcs):
+            self.generate()
+            return
+
+        self.gen_stages(self.dirty)
+        self.dirty = set()
+
+    def sweep(self, stage, param, values, **kwargs):
+        """Regenerate the population for each value of a parameter.
+
+        Only stages depending on the swept parameter are regenerated, all
+        others are shared between the variants. Each variant draws these
+        stages from the same random numbers, so variants only differ through
+        the parameter. Afterwards the population keeps the last value.
+
+        Args:
+            stage (str): Stage of the parameter, as in set_<stage>, e.g. 'si'.
+            param (str): Name of the parameter, e.g. 'value'.
+            values (array): Values over which to sweep.
+            **kwargs: Other arguments for set_<stage>.
+
+        Yields:
+            float: Value with which the population has been regenerated
+
+        Example:
+            for si in pop.sweep('si', 'value', np.linspace(-2, 2, 11),
+                                model='constant'):
+                surv_pop = SurveyPopulation(pop, survey)
+
+        """
+        set_func = getattr(self, f'set_{stage}', None)
+        if set_func is None:
+            raise ValueError('sweep input not recognised')
+
+        # Ensure everything else is up to date
+        self.regenerate()
+        states = {k: g.bit_generator.state for k, g in self.rngs.items()}
+
+        for value in values:
+            for k, g in self.rngs.items():
+                g.bit_generator.state = states[k]
+            set_func(**kwargs, **{param: value})
+            self.regenerate()
+            yield value
+
+    def get_entropy(self):
+        """Get the population seed, or fresh entropy without one."""
+        if self.seed is None:
+            return np.random.SeedSequence().entropy
+        return self.seed
+
+    def set_seed_seq(self, seed_seq):
+        """Set the seed sequence from which the current sources are drawn.
+
+        Args:
+            seed_seq (SeedSequence): Seed sequence of the sources.
+        """
+        self.seed_seq = seed_seq
+        stages = CosmicPopulation.stages
+        seeds = self.sub_seed(0).spawn(len(stages))
+        self.rngs = {s: np.random.default_rng(seeds[i])
+                     for i, s in enumerate(stages)}
+
+    def sub_seed(self, k):
+        """Get the seed of a random stream belonging to the current sources.
+
+        Stream 0 is split over the generating stages, stream 1 is used to
+        survey the sources.
+
+        Args:
+            k (int): Number of the stream.
+
+        Returns:
+            SeedSequence: Seed sequence of the stream
+
+        """
+        s = self.seed_seq
+        return np.random.SeedSequence(s.entropy, spawn_key=s.spawn_key + (k,))
+
+    def chunk_seed(self, i, entropy=None):
+        """Get the seed sequence of the i-th chunk of sources.
+
+        Seeds only depend on the population seed and the chunk number, so
+        each chunk can be reproduced independently of the others.
+
+        Args:
+            i (int): Chunk number.
+            entropy (int): Population seed, defaults to self.seed.
+
+        Returns:
+            SeedSequence: Seed sequence of the chunk
+
+        """
+        if entropy is None:
+            entropy = self.seed
+        return np.random.SeedSequence(entropy, spawn_key=(i,))
+
+    def generate_chunks(self, chunk_size=1e6, chunks=None):
+        """Generate the population in chunks of at most chunk_size sources.
+
+        Each chunk is a fresh FRBs object, so memory use only depends on the
+        chunk size rather than on n_srcs. Source indices run on across
+        chunks. While a chunk is being handed out, n_srcs and frbs refer to
+        that chunk, allowing it to be surveyed as if it were a population.
+
+        Chunks only depend on the seed and their number, so with a seed set,
+        workers each generating a selection of the chunks give the same
+        result as generating them all in serial.
+
+        Args:
+            chunk_size (int): Maximum number of sources per chunk.
+            chunks (list): Numbers of the chunks to generate. Defaults to all.
+
+        Yields:
+            FRBs: Sources in a chunk
+
+        """
+        chunk_size = int(chunk_size)
+        n_srcs = self.n_srcs
+        starts = range(0, n_srcs, chunk_size)
+        if chunks is None:
+            chunks = range(len(starts))
+
+        # Without a seed, draw one for all chunks of this run
+        entropy = self.get_entropy()
+
+        pprint(f'Generating {self.name} population in chunks')
+        try:
+            for i in chunks:
+                start = starts[i]
+                self.n_srcs = min(chunk_size, n_srcs - start)
+                self.shape = (self.n_srcs,)
+                self.frbs = FRBs()
+
+                # Give each chunk an independent random stream
+                self.set_seed_seq(self.chunk_seed(i, entropy))
+
+                self.gen_all()
+                self.frbs.index += start
+                yield self.frbs
+        finally:
+            self.n_srcs = n_srcs
+            self.shape = (n_srcs,)
         pprint(f'Finished generating {self.name} population')
 
     @classmethod
@@ -566,6 +1058,38 @@ class CosmicPopulation(Population):
             pop.generate()
         return pop
 
+
+def calc_gal_coords(frbs):
+    """Calculate galactic coordinates of FRBs.
+
+    Args:
+        frbs (FRBs): FRBs with directions and distances.
+
+    Returns:
+        tuple: Galactic X, Y and Z coordinates [Gpc]
+
+    """
+    # Get the proper distance
+    dist_pr = frbs.dist_co/(1+frbs.z)
+    # Convert into galactic coordinates
+    return go.lb_to_xyz(frbs.gl, frbs.gb, dist_pr)
+
+
+def calc_w_int(frbs):
+    """Calculate intrinsic pulse widths from the pulse widths at Earth.
+
+    Args:
+        frbs (FRBs): FRBs with pulse widths and redshifts.
+
+    Returns:
+        tuple: Intrinsic pulse widths [ms]
+
+    """
+    if frbs.w_arr.ndim == 1:
+        return (frbs.w_arr/(1+frbs.z), )
+    return (frbs.w_arr/(1+frbs.z)[:, np.newaxis], )
+
+
 if __name__ == '__main__':
     # Quick test whether everything seems to be working or not
     import os
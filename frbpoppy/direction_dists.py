@@ -1,8 +1,14 @@
 """Spatial direction distributions for FRB sources."""
 import numpy as np
 
+import frbpoppy.galacticops as go
 
-def uniform(min_ra=0, max_ra=360, min_dec=-90, max_dec=90, n_srcs=1):
+# Rounds of drawing without accepting any direction before giving up
+MAX_EMPTY_ROUNDS = 100
+
+
+def uniform(min_ra=0, max_ra=360, min_dec=-90, max_dec=90, n_srcs=1,
+            rng=None):
     """Generate a uniform distribution of pointings.
 
     Args:
@@ -11,12 +17,13 @@ def uniform(min_ra=0, max_ra=360, min_dec=-90, max_dec=90, n_srcs=1):
         min_dec (float): Minimum declination [frac deg].
         max_dec (float): Maximum declination [frac deg].
         n_srcs (int): Number of sources for which to generate.
+        rng (Generator): Random number generator. Defaults to a new one.
 
     Returns:
         tuple: RA, Dec arrays [frac deg]
 
     """
-    u = np.random.uniform
+    u = np.random.default_rng(rng).uniform
     ra = u(min_ra, max_ra, n_srcs)
     min_dec_x = np.cos(np.deg2rad(min_dec + 90))
     max_dec_x = np.cos(np.deg2rad(max_dec + 90))
@@ -24,6 +31,144 @@ def uniform(min_ra=0, max_ra=360, min_dec=-90, max_dec=90, n_srcs=1):
     return ra, dec
 
 
+def sky_fraction(min_ra=0, max_ra=360, min_dec=-90, max_dec=90):
+    """Calculate the fraction of the sky within coordinate limits.
+
+    Works equally for limits in Galactic longitude and latitude.
+
+    Args:
+        min_ra (float): Minimum right ascenion [frac deg].
+        max_ra (float): Maximum right ascenion [frac deg].
+        min_dec (float): Minimum declination [frac deg].
+        max_dec (float): Maximum declination [frac deg].
+
+    Returns:
+        float: Fraction of the full sky
+
+    """
+    f_ra = (max_ra - min_ra)/360
+    f_dec = (np.sin(np.deg2rad(max_dec)) - np.sin(np.deg2rad(min_dec)))/2
+    return f_ra*f_dec
+
+
+def _proposal_boxes(regions):
+    """Choose the smallest box, equatorial or Galactic, around each region.
+
+    Returns:
+        list, array: Tuples of (region, galactic), sky fraction per box
+
+    """
+    boxes = []
+    areas = []
+    for r in regions:
+        eq = sky_fraction(r['ra_min'], r['ra_max'], r['dec_min'], r['dec_max'])
+        gal = sky_fraction(r['gl_min'], r['gl_max'], r['gb_min'], r['gb_max'])
+        boxes.append((r, gal < eq))
+        areas.append(min(eq, gal))
+    return boxes, np.array(areas)
+
+
+def _propose(boxes, areas, n, rng):
+    """Draw directions from the proposal boxes, weighted by their area."""
+    ra = np.empty(n)
+    dec = np.empty(n)
+    which = rng.choice(len(boxes), size=n, p=areas/areas.sum())
+    for i, (r, galactic) in enumerate(boxes):
+        ix = np.flatnonzero(which == i)
+        if galactic:
+            gl, gb = uniform(r['gl_min'], r['gl_max'], r['gb_min'],
+                             r['gb_max'], n_srcs=ix.size, rng=rng)
+            ra[ix], dec[ix] = go.lb_to_radec(gl, gb)
+        else:
+            ra[ix], dec[ix] = uniform(r['ra_min'], r['ra_max'], r['dec_min'],
+                                      r['dec_max'], n_srcs=ix.size, rng=rng)
+    return ra, dec
+
+
+def _accept_prob(boxes, ra, dec):
+    """Probability to accept proposed directions.
+
+    Directions outside all regions are rejected, while directions within
+    multiple (overlapping) proposal boxes are accepted in proportion, making
+    the accepted directions uniform over the union of the regions.
+    """
+    gl, gb = go.radec_to_lb(ra, dec, frac=True)
+    n_boxes = np.zeros(ra.shape)
+    in_any = np.zeros(ra.shape, dtype=bool)
+    for r, galactic in boxes:
+        if galactic:
+            n_boxes += go.in_region(ra, dec, gl, gb, gl_min=r['gl_min'],
+                                    gl_max=r['gl_max'], gb_min=r['gb_min'],
+                                    gb_max=r['gb_max'])
+        else:
+            n_boxes += go.in_region(ra, dec, gl, gb, ra_min=r['ra_min'],
+                                    ra_max=r['ra_max'], dec_min=r['dec_min'],
+                                    dec_max=r['dec_max'])
+        in_any |= go.in_region(ra, dec, gl, gb, **r)
+    return in_any / np.maximum(n_boxes, 1)
+
+
+def footprint(regions, n_srcs=1, rng=None):
+    """Generate directions uniformly within the footprints of surveys.
+
+    Args:
+        regions (list): Survey region limits, see Survey.region_limits.
+        n_srcs (int): Number of sources for which to generate.
+        rng (Generator): Random number generator. Defaults to a new one.
+
+    Returns:
+        tuple: RA, Dec arrays [frac deg]
+
+    """
+    rng = np.random.default_rng(rng)
+    boxes, areas = _proposal_boxes(regions)
+    if areas.sum() == 0:
+        raise ValueError(f'Survey regions {regions} cover no sky')
+
+    ra = np.empty(n_srcs)
+    dec = np.empty(n_srcs)
+    n_done = 0
+    n_empty = 0  # Consecutive rounds without accepted directions
+    while n_done < n_srcs:
+        n = n_srcs - n_done
+        p_ra, p_dec = _propose(boxes, areas, n, rng)
+        accept = rng.random(n) < _accept_prob(boxes, p_ra, p_dec)
+        n_acc = np.count_nonzero(accept)
+
+        # Equatorial and Galactic limits of regions might not intersect
+        n_empty = 0 if n_acc else n_empty + 1
+        if n_empty == MAX_EMPTY_ROUNDS:
+            m = f'No directions found within survey regions {regions}, '
+            m += 'their equatorial and galactic limits may not overlap'
+            raise ValueError(m)
+        ra[n_done:n_done+n_acc] = p_ra[accept]
+        dec[n_done:n_done+n_acc] = p_dec[accept]
+        n_done += n_acc
+
+    return ra, dec
+
+
+def footprint_fraction(regions, n_test=int(1e6)):
+    """Calculate the fraction of the sky covered by survey footprints.
+
+    Estimated by proposing directions as in footprint, with a fixed seed so
+    the same regions always give the same fraction.
+
+    Args:
+        regions (list): Survey region limits, see Survey.region_limits.
+        n_test (int): Number of directions with which to estimate.
+
+    Returns:
+        float: Fraction of the full sky
+
+    """
+    boxes, areas = _proposal_boxes(regions)
+    if areas.sum() == 0:
+        return 0.
+    ra, dec = _propose(boxes, areas, n_test, np.random.default_rng(0))
+    return areas.sum()*np.mean(_accept_prob(boxes, ra, dec))
+
+
 if __name__ == '__main__':
     import matplotlib.pyplot as plt
     ra, dec = uniform(min_ra=0, max_ra=360, min_dec=-45, max_dec=90,
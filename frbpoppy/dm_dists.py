@@ -3,12 +3,12 @@ import numpy as np
 import frbpoppy.gen_dists as gd
 
 
-def constant(value=100, n_srcs=1):
+def constant(value=100, n_srcs=1, rng=None):
     """Adopt a constant DM value similar to Thorton."""
     return np.full(n_srcs, value).astype(np.float32)
 
 
-def ioka(z=0, slope=950, std=None, spread_dist='normal'):
+def ioka(z=0, slope=950, std=None, spread_dist='normal', rng=None):
     """Calculate the contribution of the igm to the dispersion measure.
 
     Follows Ioka (2003) and Inoue (2004), with default slope value falling
@@ -20,6 +20,7 @@ def ioka(z=0, slope=950, std=None, spread_dist='normal'):
         std (float): Spread around the DM-z relationship.
         spread_dist (str): Spread function option. Choice from
             ('normal', 'lognormal', 'log10normal')
+        rng (Generator): Random number generator. Defaults to a new one.
 
     Returns:
         dm_igm (array): Dispersion measure of intergalactic medium [pc/cm^3]
@@ -31,19 +32,19 @@ def ioka(z=0, slope=950, std=None, spread_dist='normal'):
     # Set up spread distribution
     mean = slope*z
     if spread_dist == 'normal':
-        f = np.random.normal
+        f = np.random.default_rng(rng).normal
     elif spread_dist == 'lognormal':
         def f(mean, std):
-            return gd.lognormal(mean, std)
+            return gd.lognormal(mean, std, None, rng=rng)
     elif spread_dist == 'log10normal':
         def f(mean, std):
-            return gd.log10normal(mean, std)
+            return gd.log10normal(mean, std, None, rng=rng)
     else:
         raise ValueError('spread_dist input not recognised')
     return f(mean, std).astype(np.float32)
 
 
-def gauss(mean=100, std=200, n_srcs=1, z=0):
+def gauss(mean=100, std=200, n_srcs=1, z=0, rng=None):
     """Generate dm host contributions similar to Tendulkar.
 
     Args:
@@ -51,16 +52,17 @@ def gauss(mean=100, std=200, n_srcs=1, z=0):
         std (float): Standard deviation DM [pc/cm^3].
         n_srcs (int): Number of sources for which to generate values.
         z (int): Redshift of sources.
+        rng (Generator): Random number generator. Defaults to a new one.
 
     Returns:
         array: DM host [pc/cm^3]
 
     """
-    dm_host = gd.trunc_norm(mean, std, n_srcs).astype(np.float32)
+    dm_host = gd.trunc_norm(mean, std, n_srcs, rng=rng).astype(np.float32)
     return dm_host / (1 + z)
 
 
-def log10normal(mean=100, std=200, n_srcs=1, z=0):
+def log10normal(mean=100, std=200, n_srcs=1, z=0, rng=None):
     """Generate a log10 normal dm host distribution.
 
     Args:
@@ -68,16 +70,17 @@ def log10normal(mean=100, std=200, n_srcs=1, z=0):
         std (float): Standard deviation DM [pc/cm^3].
         n_srcs (int): Number of sources for which to generate values.
         z (int): Redshift of sources.
+        rng (Generator): Random number generator. Defaults to a new one.
 
     Returns:
         array: DM host [pc/cm^3]
 
     """
-    dm_host = gd.log10normal(mean, std, n_srcs).astype(np.float32)
+    dm_host = gd.log10normal(mean, std, n_srcs, rng=rng).astype(np.float32)
     return dm_host / (1 + z)
 
 
-def lognormal(mean=100, std=200, n_srcs=1, z=0):
+def lognormal(mean=100, std=200, n_srcs=1, z=0, rng=None):
     """Generate a lognormal dm host distribution.
 
     Args:
@@ -85,10 +88,11 @@ def lognormal(mean=100, std=200, n_srcs=1, z=0):
         std (float): Standard deviation DM [pc/cm^3].
         n_srcs (int): Number of sources for which to generate values.
         z (int): Redshift of sources.
+        rng (Generator): Random number generator. Defaults to a new one.
 
     Returns:
         array: DM host [pc/cm^3]
 
     """
-    dm_host = gd.lognormal(mean, std, n_srcs).astype(np.float32)
+    dm_host = gd.lognormal(mean, std, n_srcs, rng=rng).astype(np.float32)
     return dm_host / (1 + z)
@@ -79,7 +79,14 @@ def histogram(dfs, n_bins=50, log=False, mc=False, cum=False):
 
             col = df[c].apply(pd.to_numeric, errors='coerce')
             col = col.dropna()
-            h, _ = np.histogram(col, bins=bins)
+
+            # Honour importance weights
+            weights = None
+            if 'weight' in df:
+                weights = pd.to_numeric(df['weight'], errors='coerce')
+                weights = weights[col.index]
+
+            h, _ = np.histogram(col, bins=bins, weights=weights)
 
             # Normalise
             h = h/sum(h)
@@ -2,12 +2,23 @@
 import numpy as np
 import pandas as pd
 
+from frbpoppy.ragged import Ragged
+
 
 class FRBs:
-    """Class containing FRB properties."""
+    """Class containing FRB properties.
+
+    Parameters derived from other parameters can be registered as lazy with
+    set_lazy, in which case they're only calculated upon first access.
+    Parameters of repeater bursts are either NaN-padded 2D arrays, or Ragged
+    arrays storing the bursts of all sources flat.
+    """
 
     def __init__(self):
         """Initializing."""
+        # Functions calculating lazy parameters, by parameter name
+        self._lazy = {}
+
         # Location properties
         self.ra = None  # Right ascension [frac degree]
         self.dec = None  # Declination [frac degree]
@@ -18,6 +29,8 @@ class FRBs:
         self.gy = None  # Galactic Y coordinate [Gpc]
         self.gz = None  # Galactic Z coordinate [Gpc]
         self.z = 0  # Redshift
+        self.pix = None  # Sky pixel, see CosmicPopulation.set_direction
+        self.pix_jitter = None  # Pixel rows and offsets within pixels
 
         # Dispersion measure properties
         self.dm_host = 0  # DM host galaxy [pc/cm^3]
@@ -47,13 +60,103 @@ class FRBs:
 
         # Software properties
         self.index = None  # Index to keep track of FRBs
+        self.weight = None  # Importance weight, see set_flux_limit
+
+    def __getattr__(self, attr):
+        """Calculate a lazy parameter upon first access."""
+        # Only called if attr isn't set, so can't be found in __dict__
+        lazy = self.__dict__.get('_lazy', {})
+        if attr.startswith('__') or attr not in lazy:
+            raise AttributeError(f"'FRBs' object has no attribute '{attr}'")
+
+        names, func = lazy[attr]
+        for name, value in zip(names, func(self)):
+            setattr(self, name, value)
+
+        return self.__dict__[attr]
+
+    def __setattr__(self, attr, value):
+        """Setting a parameter overrides any lazy calculation of it."""
+        lazy = self.__dict__.get('_lazy')
+        if lazy:
+            lazy.pop(attr, None)
+        object.__setattr__(self, attr, value)
+
+    def set_lazy(self, names, func):
+        """Only calculate parameters upon first access.
+
+        The function is called with the FRBs object at the time of access, so
+        should only derive parameters from other parameters. As such, masks
+        applied beforehand carry through to the lazy parameters.
+
+        Args:
+            names (tuple): Names of parameters calculated by func.
+            func (function): Function taking an FRBs object and returning a
+                tuple of parameters in the order of names.
+        """
+        for name in names:
+            self.__dict__.pop(name, None)
+            self._lazy[name] = (names, func)
+
+    def materialize(self):
+        """Calculate all lazy parameters."""
+        for name in list(self._lazy):
+            if name in self._lazy:
+                getattr(self, name)
+
+    def per_burst(self, attr):
+        """Get a parameter with a value per burst.
+
+        Parameters with a single value per source are broadcast over the
+        bursts of each source as a read-only view, rather than copied.
+
+        Args:
+            attr (str): Name of the parameter.
+
+        Returns:
+            array: Parameter in the shape of the burst times
+
+        """
+        parm = getattr(self, attr)
+        if not isinstance(parm, np.ndarray) or parm.ndim != 1:
+            return parm
+        if isinstance(self.time, Ragged):
+            return self.time.like(parm[self.time.rows()])
+        if isinstance(self.time, np.ndarray) and self.time.ndim == 2:
+            return np.broadcast_to(parm[:, np.newaxis], self.time.shape)
+        return parm
+
+    def at_bursts(self, attr, ix):
+        """Get a parameter for a selection of bursts.
+
+        Args:
+            attr (str): Name of the parameter.
+            ix (tuple): Source and burst indices of the bursts, the latter
+                into the flat values if bursts are stored ragged.
+
+        Returns:
+            array: Parameter value per selected burst
+
+        """
+        parm = getattr(self, attr)
+        if isinstance(parm, Ragged):
+            return parm[ix]
+        if not isinstance(parm, np.ndarray) or parm.ndim == 0:
+            return parm
+        if parm.ndim == 1:
+            return parm[ix[0]]
+        return parm[ix]
 
     def __str__(self):
         """Define how to print an FRB object to a console."""
         s = 'FRBs properties:'
         for key, value in vars(self).items():
+            if key.startswith('_'):
+                continue
             if isinstance(value, np.ndarray):
                 value = f'{len(value)} elements - {value[:2]} etc.'
+            elif isinstance(value, Ragged):
+                value = f'{value.size} bursts of {len(value)} sources'
             s = '\n\t'.join([s, f"{key}: {value}"])
 
         return s
@@ -63,13 +166,27 @@ class FRBs:
 
         Args:
             mask (array): Masking array to apply to all frb parameters.
+                Ragged masks select bursts, keeping sources with any left.
 
         """
+        src_mask = None
+        if isinstance(mask, Ragged):
+            src_mask = mask.any(axis=1)
+
         for attr in self.__dict__.keys():
             parm = getattr(self, attr)
-            if isinstance(parm, np.ndarray):
+            if isinstance(parm, Ragged):
+                if src_mask is not None:
+                    parm = parm[mask][src_mask]
+                else:
+                    parm = parm[mask]
+                setattr(self, attr, parm)
+            elif isinstance(parm, np.ndarray):
+                # Ragged mask on source array
+                if src_mask is not None:
+                    setattr(self, attr, parm[src_mask])
                 # 1D mask on 1D or 2D array
-                if mask.ndim == 1:
+                elif mask.ndim == 1:
                     setattr(self, attr, parm[mask])
                 else:
                     # 2D mask on 1D array
@@ -91,7 +208,7 @@ class FRBs:
     def clean_up(self):
         """Clean up 2D parameter arrays by left justifying them."""
         # First apply a time mask everywhere
-        if type(self.time) is np.ndarray:
+        if isinstance(self.time, (np.ndarray, Ragged)):
             time_mask = ~np.isnan(self.time)
             self.apply(time_mask)
 
@@ -108,32 +225,28 @@ class FRBs:
 
     def to_df(self):
         """Convert properties to a Pandas DataFrame."""
+        self.materialize()
+
         # Find all source properties
         df = pd.DataFrame()
+        bursts = None
+        if isinstance(self.time, np.ndarray):
+            bursts = ~np.isnan(self.time)
+
         for attr in self.__dict__.keys():
             parm = getattr(self, attr)
+            if isinstance(parm, Ragged):
+                df[attr] = parm.values
+                continue
             if type(parm) is not np.ndarray:
                 continue
 
-            # 2D arrays to 1D
-            if parm.ndim > 1:
+            # One row per burst, with source properties broadcast to them
+            if isinstance(self.time, Ragged):
+                df[attr] = parm[self.time.rows()]
+            elif bursts is not None:
                 if parm.size > 0:
-                    df[attr] = parm[~np.isnan(self.time)]
-            # 1D array to match length 2D->1D arrays
-            elif type(self.time) is np.ndarray:
-                concate = np.array([parm, ]*self.time.shape[1]).transpose()
-                if concate.size > 0:
-                    df[attr] = concate[~np.isnan(self.time)]
-            else:
-                df[attr] = parm
-
-            # 2D arrays to 1D
-            if parm.ndim > 1:
-                df[attr] = parm[~np.isnan(self.time)]
-            # 1D array to match length 2D->1D arrays
-            elif type(self.time) is np.ndarray:
-                concate = np.array([parm, ]*self.time.shape[1]).transpose()
-                df[attr] = concate[~np.isnan(self.time)]
+                    df[attr] = self.per_burst(attr)[bursts]
             else:
                 df[attr] = parm
 
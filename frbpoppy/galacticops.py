@@ -10,6 +10,7 @@ import numpy as np
 import os
 import pandas as pd
 import random
+import threading
 
 from frbpoppy.paths import paths
 
@@ -20,6 +21,26 @@ loc = os.path.join(dm_mods, 'libne2001.so')
 ne2001lib = C.CDLL(loc)
 ne2001lib.dm_.restype = C.c_float
 
+# Set up the array versions of the NE2001 functions (if compiled)
+_f_arr = np.ctypeslib.ndpointer(dtype=np.float32, flags='C_CONTIGUOUS')
+NE2001_BATCH = hasattr(ne2001lib, 'dm_batch_')
+if NE2001_BATCH:
+    ne2001lib.dm_batch_.restype = None
+    ne2001lib.dm_batch_.argtypes = [C.POINTER(C.c_int), _f_arr, _f_arr,
+                                    _f_arr, _f_arr, C.c_char_p,
+                                    C.POINTER(C.c_int)]
+    ne2001lib.smtau_batch_.restype = None
+    ne2001lib.smtau_batch_.argtypes = [C.POINTER(C.c_int), _f_arr, _f_arr,
+                                       _f_arr, _f_arr, _f_arr, C.c_char_p,
+                                       C.POINTER(C.c_int)]
+
+# NE2001 keeps its model state in Fortran common blocks, so calls into the
+# library can not overlap. The GIL is released during each call however.
+_ne2001_lock = threading.Lock()
+
+# Haslam sky temperature map, read in upon first use
+_t_sky = None
+
 
 def frac_deg(ra, dec):
     """Convert coordinates expressed in hh:mm:ss to fractional degrees."""
@@ -231,18 +252,64 @@ def ne2001_dist_to_dm(dist, gl, gb):
     inpath = C.create_string_buffer(dm_mods.encode())
     linpath = C.c_int(len(dm_mods))
 
-    dm = ne2001lib.dm_(C.byref(dist),
-                       C.byref(gl),
-                       C.byref(gb),
-                       C.byref(C.c_int(4)),
-                       C.byref(C.c_float(0.0)),
-                       C.byref(inpath),
-                       C.byref(linpath)
-                       )
+    with _ne2001_lock:
+        dm = ne2001lib.dm_(C.byref(dist),
+                           C.byref(gl),
+                           C.byref(gb),
+                           C.byref(C.c_int(4)),
+                           C.byref(C.c_float(0.0)),
+                           C.byref(inpath),
+                           C.byref(linpath)
+                           )
 
     return dm
 
 
+def _ne2001_input(dist, gl, gb):
+    """Convert NE2001 input to flat, single precision arrays."""
+    dist, gl, gb = np.broadcast_arrays(dist, gl, gb)
+    shape = dist.shape
+    dist, gl, gb = [np.ascontiguousarray(a, dtype=np.float32).ravel()
+                    for a in (dist, gl, gb)]
+    return shape, dist, gl, gb
+
+
+def ne2001_dist_to_dm_arr(dist, gl, gb):
+    """
+    Convert arrays of positions to dispersion measures using NE2001.
+
+    Array version of ne2001_dist_to_dm, in which the loop over all sources
+    happens within a single call to the NE2001 library. Falls back to
+    looping over ne2001_dist_to_dm if the library was compiled without
+    batch.f.
+
+    Args:
+        dist (array): Distance to source [Gpc]. Distance will be cut at
+                      100kpc, as NE2001 can not cope with larger distances.
+        gl (array): Galactic longitude [fractional degrees]
+        gb (array): Galactic latitude [fractional degrees]
+    Returns:
+        dm (array): Dispersion measure [pc*cm^-3]
+
+    """
+    # Convert from Gpc to kpc and cut at 100 kpc
+    dist = np.minimum(np.asarray(dist, dtype=np.float64)*1e6, 100)
+    shape, dist, gl, gb = _ne2001_input(dist, gl, gb)
+    dm = np.zeros_like(dist)
+
+    if not NE2001_BATCH:
+        for i in range(dist.size):
+            dm[i] = ne2001_dist_to_dm(dist[i]*1e-6, gl[i], gb[i])
+        return dm.reshape(shape)
+
+    inpath = dm_mods.encode()
+    with _ne2001_lock:
+        ne2001lib.dm_batch_(C.byref(C.c_int(dist.size)), dist, gl, gb, dm,
+                            inpath, C.byref(C.c_int(len(dm_mods))))
+
+    return dm.reshape(shape)
+
+
 def ne2001_get_smtau(dist, gl, gb):
     """
     Use the NE2001 model to calculate scattering measure.
@@ -264,41 +331,57 @@ def ne2001_get_smtau(dist, gl, gb):
     """
     # NE2001 gives errors if distance input is too large! 100 kpc ought to be
     # enough to clear the galaxy.
-    dist[dist > 100] = 100
+    dist = np.minimum(dist, 100)
+
+    # Note the galactic coordinates need to be given in radians
+    shape, dist, gl, gb = _ne2001_input(dist, np.radians(gl), np.radians(gb))
+
+    if NE2001_BATCH:
+        sms = np.zeros_like(dist)
+        smtaus = np.zeros_like(dist)
+
+        inpath = dm_mods.encode()
+        with _ne2001_lock:
+            ne2001lib.smtau_batch_(C.byref(C.c_int(dist.size)), dist, gl,
+                                   gb, sms, smtaus, inpath,
+                                   C.byref(C.c_int(len(dm_mods))))
+
+        return sms.reshape(shape), smtaus.reshape(shape)
+
     sms = np.ones_like(dist)
     smtaus = np.ones_like(dist)
 
+    inpath = C.create_string_buffer(dm_mods.encode())
+    linpath = C.c_int(len(dm_mods))
+
     for i, d in enumerate(dist):
 
         disti = C.c_float(d)
-        # Note the galactic coordinates need to be given in radians
-        gli = C.c_float(math.radians(gl[i]))
-        gbi = C.c_float(math.radians(gb[i]))
+        gli = C.c_float(gl[i])
+        gbi = C.c_float(gb[i])
 
         ndir = C.c_int(-1)
         sm = C.c_float(0.)
         smtau = C.c_float(0.)
 
-        inpath = C.create_string_buffer(dm_mods.encode())
-        linpath = C.c_int(len(dm_mods))
-
-        ne2001lib.dmdsm_(C.byref(gli),
-                         C.byref(gbi),
-                         C.byref(ndir),
-                         C.byref(C.c_float(0.0)),
-                         C.byref(disti),
-                         C.byref(C.create_string_buffer(' '.encode())),
-                         C.byref(sm),
-                         C.byref(smtau),
-                         C.byref(C.c_float(0.0)),
-                         C.byref(C.c_float(0.0)),
-                         C.byref(inpath),
-                         C.byref(linpath)
-                         )
+        with _ne2001_lock:
+            ne2001lib.dmdsm_(C.byref(gli),
+                             C.byref(gbi),
+                             C.byref(ndir),
+                             C.byref(C.c_float(0.0)),
+                             C.byref(disti),
+                             C.byref(C.create_string_buffer(' '.encode())),
+                             C.byref(sm),
+                             C.byref(smtau),
+                             C.byref(C.c_float(0.0)),
+                             C.byref(C.c_float(0.0)),
+                             C.byref(inpath),
+                             C.byref(linpath)
+                             )
 
         sms[i], smtaus[i] = sm.value, smtau.value
 
-    return sms, smtaus
+    return sms.reshape(shape), smtaus.reshape(shape)
 
 
 def ne2001_scint_time_bw(dist, gl, gb, freq):
@@ -318,26 +401,46 @@ def ne2001_scint_time_bw(dist, gl, gb, freq):
         scint_bw (float): Scintillation bandwidth [Hz]
 
     """
-    dist *= 1e6  # Convert from Gpc to kpc
+    # Convert from Gpc to kpc, using the same cut as ne2001_get_smtau
+    dist = np.minimum(dist*1e6, 100)
 
     sm, smtau = ne2001_get_smtau(dist, gl, gb)
 
-    scint_time = np.ones_like(dist)
-    scint_time[smtau <= 0.] = float('NaN')
+    return sm_to_scint_time_bw(sm, smtau, dist, freq)
+
+
+def sm_to_scint_time_bw(sm, smtau, dist, freq):
+    """
+    Convert scattering measures to a scintillation timescale and bandwidth.
+
+    Args:
+        sm (array): Scattering measure
+        smtau (array): Scattering measure for the scattering time
+        dist (array): Distance to source, cut at 100 kpc [kpc]
+        freq (float): Observing frequency [MHz]
+    Returns:
+        scint_time (float): Diffractive scintillation timescale [Hz]
+        scint_bw (float): Scintillation bandwidth [Hz]
+
+    """
+    sm, smtau, dist = np.broadcast_arrays(sm, smtau, dist)
+
+    scint_time = np.full(smtau.shape, np.nan)
+    pos = (smtau > 0.)
     # Eq. 46 of Cordes & Lazio 1991, ApJ, 376, 123 uses coefficient 3.3
     # instead of 2.3. They do this in the code and mention it explicitly,
     # so I trust it! <- From psrpoppy
-    scint_time[smtau > 0.] = 3.3 * (freq/1e3)**1.2 * smtau**(-0.6)
+    scint_time[pos] = 3.3 * (freq/1e3)**1.2 * smtau[pos]**(-0.6)
 
-    scint_bw = np.ones_like(dist)
-    scint_bw[sm <= 0.] = float('NaN')
+    scint_bw = np.full(sm.shape, np.nan)
+    pos = (sm > 0.)
     # (eq. 48)
-    scint_bw[sm > 0.] = 223. * (freq/1e3)**4.4 * sm**(-1.2) / dist
+    scint_bw[pos] = 223. * (freq/1e3)**4.4 * sm[pos]**(-1.2) / dist[pos]
 
     return scint_time, scint_bw
 
 
-def scatter_bhat(dm, offset=-6.46, scindex=-3.86, freq=1400.0):
+def scatter_bhat(dm, offset=-6.46, scindex=-3.86, freq=1400.0, rng=None):
     """
     Calculate scattering timescale (values default to those from Bhat et al.
     (2004, DOI:10.1086/382680) and to simluate the scatter around this
@@ -349,6 +452,7 @@ def scatter_bhat(dm, offset=-6.46, scindex=-3.86, freq=1400.0):
         scindex (float): Scattering index. Defaults to -3.86
         freq (float): Frequency at which to evaluate scattering time [MHz].
                       Defaults to 1400 MHz
+        rng (Generator): Random number generator. Defaults to a new one.
     Returns:
         array: Scattering timescale [ms]
 
@@ -357,14 +461,14 @@ def scatter_bhat(dm, offset=-6.46, scindex=-3.86, freq=1400.0):
     log_t += scindex*np.log10(freq/1e3)
 
     # Width of Gaussian distribution based on values given Lorimer et al (2008)
-    t_scat = 10**np.random.normal(log_t, 0.8)
+    t_scat = 10**np.random.default_rng(rng).normal(log_t, 0.8)
 
     return t_scat
 
 
 def load_T_sky():
     """
-    Read the Haslam sky temperature map into a list.
+    Read the Haslam sky temperature map into an array.
 
     ... from which temperatures can
     be retrieved. The temperature sky map is given in the weird units of
@@ -373,27 +477,49 @@ def load_T_sky():
     have therefore directly copied the following code from psrpoppy in the
     assumption Sam Bates managed to figure it out.
 
+    The text file is only parsed once, after which the map is saved in binary
+    next to it and kept in memory for the rest of the process.
+
     Returns:
-        t_sky_list (list): List of sky temperatures in HealPix? coordinates?
+        t_sky (array): Sky temperatures in HealPix? coordinates? [K]
 
     """
+    global _t_sky
+    if _t_sky is not None:
+        return _t_sky
+
     model = os.path.join(os.path.dirname(__file__), '../data/models/tsky/')
     path = os.path.join(model, 'haslam_2014.dat')
+    bin_path = os.path.splitext(path)[0] + '.npy'
+
+    # Only trust the binary version if it's been made from the current map
+    if (os.path.exists(bin_path) and
+            os.path.getmtime(bin_path) >= os.path.getmtime(path)):
+        _t_sky = np.load(bin_path)
+        return _t_sky
 
     t_sky_list = []
     with open(path) as f:
         for line in f:
-            str_idx = 0
-            while str_idx < len(line):
-                # each temperature occupies space of 5 chars
-                temp_string = line[str_idx:str_idx+5]
+            # Each temperature occupies space of 5 chars
+            for str_idx in range(0, len(line), 5):
                 try:
-                    t_sky_list.append(float(temp_string))
+                    t_sky_list.append(float(line[str_idx:str_idx+5]))
                 except ValueError:
                     pass
-                str_idx += 5
 
-    return t_sky_list
+    _t_sky = np.array(t_sky_list, dtype=np.float32)
+
+    # Only let a complete file replace the binary map
+    try:
+        temp_path = f'{bin_path}.{os.getpid()}.part'
+        with open(temp_path, 'wb') as f:
+            np.save(f, _t_sky)
+        os.replace(temp_path, bin_path)
+    except OSError:  # E.g. when installed in a read-only location
+        pass
+
+    return _t_sky
 
 
 class Redshift:
@@ -449,6 +575,27 @@ class Redshift:
 
         return self.dc_mpc*1e-3  # Convert to Gpc
 
+    def dist_co_grid(self):
+        """Calculate the comoving distance [Gpc] along a grid of redshifts.
+
+        Gives the same result as dist_co, but integrates 1/E(z) cumulatively
+        along the redshifts with the trapezoidal rule, taking a single pass
+        rather than looping over all redshifts a thousand times. Redshifts
+        need to be sorted in increasing order.
+        """
+        z = np.asarray(self.z, dtype=np.float64)
+        z = np.concatenate(([0.], z))
+
+        z1 = 1 + z
+        e = np.sqrt(self.W_k*z1**2 + self.W_m*z1**3 + self.W_r*z1**4 + self.W_v)
+        inv_e = 1/e
+
+        self.dcmr = np.cumsum(0.5*(inv_e[1:] + inv_e[:-1])*np.diff(z))
+
+        self.dc_mpc = (self.c/self.H_0)*self.dcmr  # Comoving distance [Mpc]
+
+        return self.dc_mpc*1e-3  # Convert to Gpc
+
     def dist_lum(self):
         """Calculate the corresponding luminosity distance [Gpc]."""
         if self.dc_mpc is None:
@@ -1,9 +1,9 @@
 """Define general distributions from which to get random numbers."""
 import numpy as np
-from scipy.stats import truncnorm
+from scipy.special import ndtr, ndtri
 
 
-def powerlaw(low, high, power, shape=1):
+def powerlaw(low, high, power, shape=1, rng=None):
     """
     Return random variables distributed according to power law.
 
@@ -11,67 +11,50 @@ def powerlaw(low, high, power, shape=1):
     sign (N(x) scales with x^p with p the power). A flat powerlaw can therefore
     be created by taking setting power to zero.
 
+    Drawn by inverting the cumulative distribution between the limits, so
+    costing a single uniform draw per value. All parameters can be arrays,
+    broadcast against shape.
+
     Args:
-        low (float): low limit of distribution
-        high (float): Higher limit of distribution
-        power (float): Power of power law distribution
+        low (float/array): low limit of distribution
+        high (float/array): Higher limit of distribution
+        power (float/array): Power of power law distribution
         shape (int/tuple): Shape of array to be generated. Can also be a int.
+        rng (Generator): Random number generator. Defaults to a new one.
 
     Returns:
         array: Random variable picked from power law distribution
 
     """
-    if low > high:
-        low, high = high, low
-
-    if power == 0 or low == high:
-        return 10**np.random.uniform(np.log10(low), np.log10(high), shape)
-
-    def sample(n_gen):
-        pl = np.random.uniform(0, 1, n_gen)**(1/power)
-        if power > 0:
-            addition = np.log10(high)
-        else:
-            addition = np.log10(low)
-        log_pl = np.log10(pl) + addition
-        pl = 10**log_pl
-        return pl
-
-    def accept(pl):
-        if power > 0:
-            return pl >= low
-        else:
-            return pl <= high
-
-    if isinstance(shape, tuple):
-        n_gen = shape[0] * shape[1]
-    else:
-        n_gen = shape
-
-    pl = sample(n_gen)
-    mask = accept(pl)
-    reject, = np.where(~mask)
-    while reject.size > 0:
-        fill = sample(reject.size)
-        mask = accept(fill)
-        pl[reject[mask]] = fill[mask]
-        reject = reject[~mask]
-
-    if isinstance(shape, tuple):
-        pl = pl.reshape(shape)
-
-    return pl
-
-
-def trunc_norm(mean, std, shape=1, low=0, high=np.inf):
+    low, high = np.minimum(low, high), np.maximum(low, high)
+    u = np.random.default_rng(rng).random(shape)
+
+    # Cumulative distribution scaled to low, keeping values within range
+    if np.ndim(power) == 0:
+        if power == 0:
+            return low*(high/low)**u
+        return low*(1 + u*((high/low)**power - 1))**(1/power)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pl = low*(1 + u*((high/low)**power - 1))**(1/power)
+
+    return np.where(power == 0, low*(high/low)**u, pl)
+
+
+def trunc_norm(mean, std, shape=1, low=0, high=np.inf, rng=None):
     """Draw from a truncated normal distribution.
 
+    Wide ranges are drawn by rejecting normal values outside the limits,
+    narrow ranges and tails by inverting the cumulative distribution. All
+    parameters can be arrays, broadcast against shape.
+
     Args:
         mean (number): Mean of the normal distribution.
         std (number): Standard deviation of the distribution.
         shape (number): Number to generate.
         low (number): Lower limit.
         high (number): Higher limit.
+        rng (Generator): Random number generator. Defaults to a new one.
 
     Returns:
         array: Numpy of required length
@@ -79,12 +62,44 @@ def trunc_norm(mean, std, shape=1, low=0, high=np.inf):
     """
     if not isinstance(std, np.ndarray) and std == 0:
         return np.full(shape, mean)
-    left = (low-mean)/std
-    right = (high-mean)/std
-    return truncnorm.rvs(left, right, loc=mean, scale=std, size=shape)
+    rng = np.random.default_rng(rng)
+
+    # Standardised limits per value
+    with np.errstate(divide='ignore', invalid='ignore'):
+        left = np.broadcast_to((low - mean)/std, shape).ravel()
+        right = np.broadcast_to((high - mean)/std, shape).ravel()
+
+    # Mirror upper tails for precision in the cumulative distribution
+    flip = left > 0
+    left, right = np.where(flip, -right, left), np.where(flip, -left, right)
+    p_left = ndtr(left)
+    p_right = ndtr(right)
+
+    x = np.empty(left.shape)
+
+    # Expect at most two draws per value for wide ranges
+    wide = (p_right - p_left) > 0.5
+    todo = np.flatnonzero(wide)
+    while todo.size > 0:
+        z = rng.standard_normal(todo.size)
+        keep = (z >= left[todo]) & (z <= right[todo])
+        x[todo[keep]] = z[keep]
+        todo = todo[~keep]
+
+    narrow = ~wide
+    u = rng.random(np.count_nonzero(narrow))
+    x[narrow] = ndtri(p_left[narrow] + u*(p_right[narrow] - p_left[narrow]))
+
+    x = mean + std*np.where(flip, -x, x).reshape(shape)
+
+    # Without spread, values stay at the mean
+    if isinstance(std, np.ndarray):
+        x = np.where(std == 0, mean, x)
+
+    return x
 
 
-def log10normal(mean, std, shape):
+def log10normal(mean, std, shape, rng=None):
     """Random values from a normal distribution in the log space.
 
     I could never quite figure out what to expect of a lognormal distribution,
@@ -92,7 +107,7 @@ def log10normal(mean, std, shape):
     distribution when binned in the log10 space.
     """
     mean, std = np.log10(mean), np.log10(std)
-    return 10**np.random.normal(mean, std, shape)
+    return 10**np.random.default_rng(rng).normal(mean, std, shape)
 
 
 def calc_lognormal_input(mean_x, std_x):
@@ -106,11 +121,11 @@ def calc_lognormal_input(mean_x, std_x):
     return normal_mean, normal_std
 
 
-def lognormal(mean, std, shape):
+def lognormal(mean, std, shape, rng=None):
     """Calculate the mean and std from the underlying distribution.
 
     See
     https://en.wikipedia.org/wiki/Log-normal_distribution
     """
     mean, std = calc_lognormal_input(mean, std)
-    return np.random.lognormal(mean, std, shape)
+    return np.random.default_rng(rng).lognormal(mean, std, shape)
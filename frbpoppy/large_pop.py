@@ -8,6 +8,7 @@ from frbpoppy.misc import pprint
 from frbpoppy.survey_pop import SurveyPopulation
 from frbpoppy.population import unpickle
 from frbpoppy.paths import paths
+from frbpoppy.ragged import Ragged
 
 
 class LargePopulation:
@@ -31,17 +32,14 @@ class LargePopulation:
     def run(self):
         """Run the generating and surveying of a large population."""
         pprint(f'Running a large {self.base_name} population')
-        d = divmod(self.pop.n_srcs, self.max_size)
-        sizes = [self.max_size for i in range(d[0])]
-        if d[1] != 0:
-            sizes.append(d[1])
-        self.uids = [str(uuid.uuid4())[:8] for s in sizes]
-
-        for i, n in enumerate(tqdm(sizes, desc='Subpopulations')):
-            pop = self.pop
-            pop.n_srcs = n
+        n_chunks = -(-self.pop.n_srcs // self.max_size)
+        self.uids = [str(uuid.uuid4())[:8] for i in range(n_chunks)]
+
+        pop = self.pop
+        chunks = pop.generate_chunks(self.max_size)
+        for i, _ in enumerate(tqdm(chunks, total=n_chunks,
+                                   desc='Subpopulations')):
             pop.uid = self.uids[i]
-            pop.generate()
 
             for surv in self.surveys:
                 surv_pop = SurveyPopulation(pop, surv, scale_by_area=False)
@@ -66,7 +64,7 @@ class LargePopulation:
             # Merge each parameter
             for attr in mp.frbs.__dict__.keys():
                 parm = getattr(mp.frbs, attr)
-                if type(parm) is np.ndarray:
+                if type(parm) in (np.ndarray, Ragged):
                     parms = []
                     for pop in pops:
                         parms.append(getattr(pop.frbs, attr))
@@ -3,31 +3,97 @@ import numpy as np
 import frbpoppy.gen_dists as gd
 
 
-def constant(value=1e40, shape=1):
+def constant(value=1e40, shape=1, rng=None):
     """Good for standard candles."""
     return np.full(shape, value)
 
 
-def powerlaw(low=1e40, high=1e45, power=0, shape=1):
+def powerlaw(low=1e40, high=1e45, power=0, shape=1, rng=None):
     """Draw luminosities from powerlaw distribution."""
-    return gd.powerlaw(low=low, high=high, power=power, shape=shape)
+    return gd.powerlaw(low=low, high=high, power=power, shape=shape, rng=rng)
 
 
-def gauss(mean=1e35, std=1e2, shape=1):
+def gauss(mean=1e35, std=1e2, shape=1, rng=None):
     """Generate luminosties from a Gaussian/Normal distribution.
 
     Args:
         mean (float): Mean luminosity [ergs/s]
         std (float): Standard deviation [ergs/s]
         shape (tuple): Required array shape
+        rng (Generator): Random number generator. Defaults to a new one.
 
     Returns:
         array: Luminosties
 
     """
-    return gd.trunc_norm(mean, std, shape)
+    return gd.trunc_norm(mean, std, shape, rng=rng)
 
 
-def log10normal(mean=1e40, std=1e2, shape=1):
+def log10normal(mean=1e40, std=1e2, shape=1, rng=None):
     """Draw luminosity from a log10normal distribution."""
-    return gd.log10normal(np.log10(mean), np.log10(std), shape)
+    return gd.log10normal(np.log10(mean), np.log10(std), shape, rng=rng)
+
+
+def _powerlaw_cdf_terms(lum_min, low=1e40, high=1e45, power=0):
+    """Scaled cumulative powerlaw distribution terms at lum_min and high."""
+    low, high = np.minimum(low, high), np.maximum(low, high)
+    lum_min = np.clip(lum_min, low, high)
+    if power == 0:
+        return low, np.log(lum_min/low), np.log(high/low)
+    return low, (lum_min/low)**power, (high/low)**power
+
+
+def fraction_above(lum_min, model='powerlaw', **kwargs):
+    """Fraction of a luminosity function above a minimum luminosity.
+
+    Args:
+        lum_min (array): Minimum luminosity [ergs/s]
+        model (str): Luminosity function. Options from ('powerlaw',
+            'constant').
+        **kwargs: Arguments of the luminosity function.
+
+    Returns:
+        array: Fraction of luminosities above lum_min
+
+    """
+    if model == 'constant':
+        return (kwargs.get('value', 1e40) >= lum_min).astype(np.float64)
+    elif model != 'powerlaw':
+        raise ValueError('set_flux_limit input not recognised')
+
+    power = kwargs.get('power', 0)
+    low, r_min, r_max = _powerlaw_cdf_terms(lum_min, **kwargs)
+    if np.all(kwargs.get('low', 1e40) == kwargs.get('high', 1e45)):
+        # Luminosity function collapsed to a single value
+        return (low >= lum_min).astype(np.float64)
+    if power == 0:
+        return (r_max - r_min) / r_max
+    return (r_max - r_min) / (r_max - 1)
+
+
+def above(lum_min, model='powerlaw', shape=1, rng=None, **kwargs):
+    """Draw luminosities only from above a minimum luminosity.
+
+    Args:
+        lum_min (array): Minimum luminosity per source [ergs/s]
+        model (str): Luminosity function. Options from ('powerlaw',
+            'constant').
+        shape (tuple): Required array shape
+        rng (Generator): Random number generator. Defaults to a new one.
+        **kwargs: Arguments of the luminosity function.
+
+    Returns:
+        array, array: Luminosities, fraction of luminosities above lum_min
+
+    """
+    frac = np.broadcast_to(fraction_above(lum_min, model, **kwargs), shape)
+    if model == 'constant':
+        return constant(shape=shape, **kwargs), frac.astype(np.float64)
+
+    low = kwargs.get('low', 1e40)
+    high = kwargs.get('high', 1e45)
+    lum_min = np.clip(lum_min, np.minimum(low, high), np.maximum(low, high))
+    lum = gd.powerlaw(lum_min, high, kwargs.get('power', 0), shape=shape,
+                      rng=rng)
+
+    return lum, frac.astype(np.float64)
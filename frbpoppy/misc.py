@@ -49,7 +49,7 @@ def progressbar(it, prefix="", size=69, file=sys.stdout):
 
 
 def hist(parameter, bin_type='lin', n_bins=25, norm='max', edges=True,
-         bins=None):
+         bins=None, weights=None):
     """Bin up a parameter either in a lin or log space.
 
     Why is this not a standard option in numpy or matplotlib?
@@ -59,6 +59,8 @@ def hist(parameter, bin_type='lin', n_bins=25, norm='max', edges=True,
         bin_type (str): Either 'lin', 'log' or 'ln'
         n_bins (int): Number of bins. Can be overriden internally
         norm (bool): Whether to normalise to 'max' or 'prob' or none
+        weights (array): Importance weight of each value, see
+            CosmicPopulation.set_flux_limit
 
     Returns:
         tuple: bin centers, values per bin
@@ -71,7 +73,10 @@ def hist(parameter, bin_type='lin', n_bins=25, norm='max', edges=True,
         return np.nan, np.nan
 
     # Drop NaN-values
-    parameter = parameter[~(np.isnan(parameter) | np.isinf(parameter))]
+    finite = ~(np.isnan(parameter) | np.isinf(parameter))
+    parameter = parameter[finite]
+    if weights is not None:
+        weights = np.broadcast_to(weights, finite.shape)[finite]
 
     # Determine number of bins
     if n_bins != 25:
@@ -98,9 +103,10 @@ def hist(parameter, bin_type='lin', n_bins=25, norm='max', edges=True,
         _bins = bins
 
     # Allow for probability weighting
-    weights = None
     if norm == 'prob':
-        weights = np.ones(len(parameter)) / len(parameter)
+        if weights is None:
+            weights = np.ones(len(parameter))
+        weights = weights / np.sum(weights)
 
     # Bin
     n, bin_edges = np.histogram(parameter, bins=_bins, weights=weights)
@@ -40,37 +40,57 @@ class NumberDensity:
         # Determine from which type of distribution to draw
         if model == 'vol_co':
             self.draw = self.from_vol_co
+            self.transform = self.vol_co_transform
         elif model == 'sfr':
             self.draw = self.from_sfr
+            self.transform = self.sfr_transform
         elif model == 'smd':
             self.draw = self.from_smd
+            self.transform = self.smd_transform
 
         # Allow for the steepness of log N log S to be adapted
         if alpha != -1.5:
             self.draw = self.sloped_dist
+            self.transform = self.sloped_transform
             self.power = -self.alpha/1.5
             self.maxi = self.vol_co_max**self.power
 
-    def sloped_dist(self, n_gen=1):
-        """Draw from a sloped distribution to create a logNlogS slope."""
-        vol_co = (self.maxi*np.random.random(n_gen))**(1/self.power)  # [Gpc]
-        d = self.dt(vol_co=vol_co)
+    def lookup(self, **kwargs):
+        """Look up redshifts and comoving distances in the distance table."""
+        d = self.dt(**kwargs)
         z = d[0]
         dist_co = d[1]
         return z.astype(np.float32), dist_co.astype(np.float32)
 
-    def from_vol_co(self, n_gen=1):
+    def sloped_transform(self, u):
+        """Convert uniform random values [0, 1) to a sloped distribution."""
+        vol_co = (self.maxi*u)**(1/self.power)  # [Gpc]
+        return self.lookup(vol_co=vol_co)
+
+    def vol_co_transform(self, u):
+        """Convert uniform random values [0, 1) to a comoving volume."""
+        return self.lookup(vol_co=self.vol_co_max*u)  # [Gpc]
+
+    def sfr_transform(self, u):
+        """Convert uniform random values [0, 1) to following the SFR."""
+        return self.lookup(cdf_sfr=self.cdf_sfr_max*u)
+
+    def smd_transform(self, u):
+        """Convert uniform random values [0, 1) to following the SMD."""
+        return self.lookup(cdf_smd=self.cdf_smd_max*u)
+
+    def sloped_dist(self, n_gen=1, rng=None):
+        """Draw from a sloped distribution to create a logNlogS slope."""
+        return self.sloped_transform(np.random.default_rng(rng).random(n_gen))
+
+    def from_vol_co(self, n_gen=1, rng=None):
         """Use constant number density of sources per comoving volume.
 
         Can be influenced by changing alpha.
         """
-        vol_co = self.vol_co_max*np.random.random(n_gen)  # [Gpc]
-        d = self.dt(vol_co=vol_co)
-        z = d[0]
-        dist_co = d[1]
-        return z.astype(np.float32), dist_co.astype(np.float32)
+        return self.vol_co_transform(np.random.default_rng(rng).random(n_gen))
 
-    def from_sfr(self, n_gen=1):
+    def from_sfr(self, n_gen=1, rng=None):
         """Get sources to follow star forming rate.
 
         Return a random redshift for sources following the Star Formation Rate.
@@ -78,21 +98,50 @@ class NumberDensity:
         Follows Madau & Dickinson (2014), eq. 15. For more info see
         https://arxiv.org/pdf/1403.0007.pdf
         """
-        sampling = np.random.uniform(0., self.cdf_sfr_max, size=n_gen)
-        d = self.dt(cdf_sfr=sampling)
-        z = d[0]
-        dist_co = d[1]
-        return z.astype(np.float32), dist_co.astype(np.float32)
+        return self.sfr_transform(np.random.default_rng(rng).random(n_gen))
 
-    def from_smd(self, n_gen=1):
+    def from_smd(self, n_gen=1, rng=None):
         """
         Return a random redshift for sources following Stellar Mass Density.
 
         Follows Madau & Dickinson (2014), eq. 2 & 15. For more info see
         https://arxiv.org/pdf/1403.0007.pdf
         """
-        sampling = np.random.uniform(0., self.cdf_smd_max, size=n_gen)
-        d = self.dt(cdf_smd=sampling)
-        z = d[0]
-        dist_co = d[1]
-        return z.astype(np.float32), dist_co.astype(np.float32)
+        return self.smd_transform(np.random.default_rng(rng).random(n_gen))
+
+    def draw_tilted(self, n_gen, tilt, n_grid=512, rng=None):
+        """Draw more often where a tilt function is high.
+
+        Half of the sources follow the number density, the other half the
+        number density multiplied by the tilt, so importance weights
+        correcting for the tilt never exceed two.
+
+        Args:
+            n_gen (int): Number of sources to draw.
+            tilt (function): Function of redshift and comoving distance
+                with non-negative values.
+            n_grid (int): Number of redshift bins over which to tilt.
+            rng (Generator): Random number generator. Defaults to a new one.
+
+        Returns:
+            array, array, array: Redshift, comoving distance [Gpc], weights
+
+        """
+        rng = np.random.default_rng(rng)
+
+        # Tilt evaluated per bin in the uniform random values
+        edges = np.linspace(0, 1, n_grid+1)
+        p = tilt(*self.transform((edges[:-1] + edges[1:])/2))
+        if not np.any(p > 0):
+            p = np.ones(n_grid)
+        p = p/np.mean(p)
+
+        # Mix the number density with the tilted one
+        u = rng.random(n_gen)
+        tilted = rng.random(n_gen) < 0.5
+        bins = rng.choice(n_grid, size=np.count_nonzero(tilted), p=p/n_grid)
+        u[tilted] = (bins + u[tilted])/n_grid
+
+        weight = 1/(0.5 + 0.5*p[np.minimum((u*n_grid).astype(int), n_grid-1)])
+        z, dist_co = self.transform(u)
+        return z, dist_co, weight
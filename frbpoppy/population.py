@@ -6,6 +6,7 @@ from copy import deepcopy
 
 from frbpoppy.paths import paths
 from frbpoppy.frbs import FRBs
+from frbpoppy.ragged import Ragged
 
 
 class Population:
@@ -187,7 +188,7 @@ def merge_pop(*args, random=False):
         # Merge each parameter
         for attr in mp.frbs.__dict__.keys():
             parm = getattr(mp.frbs, attr)
-            if type(parm) is np.ndarray:
+            if type(parm) in (np.ndarray, Ragged):
                 parms = []
                 for pop in args:
                     parms.append(getattr(pop.frbs, attr))
@@ -217,7 +218,7 @@ def merge_pop(*args, random=False):
         shuffle = np.random.permutation(mp.frbs.z.shape[0])
         for attr in mp.frbs.__dict__.keys():
             parm = getattr(mp.frbs, attr)
-            if type(parm) is np.ndarray:
+            if type(parm) in (np.ndarray, Ragged):
                 setattr(mp.frbs, attr, parm[shuffle])
 
     return mp
@@ -1,9 +1,16 @@
 """Create a lookup tables for redshift and the NE2001 dispersion measure."""
 
+from collections import OrderedDict
+import json
 import os
 import numpy as np
+import shutil
 import sqlite3
+import struct
 import sys
+import time
+import uuid
+import zlib
 from scipy.integrate import quad
 from tqdm import tqdm
 from joblib import Parallel, delayed
@@ -12,10 +19,30 @@ import frbpoppy.galacticops as go
 from frbpoppy.misc import pprint
 from frbpoppy.paths import paths
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Binary table format
+TABLE_MAGIC = b'FRBPOPPY'
+TABLE_VERSION = 1
+TABLE_ALIGN = 64  # Byte alignment of arrays within a table file
+
+# Dense NE2001 grids already mapped from disk, keyed by file name
+_ne2001_grids = {}
+
+# Distance tables already read from disk, keyed by (H_0, W_m, W_v) and
+# ordered from least to most recently used
+_distance_tables = OrderedDict()
+
 
 class NE2001Table:
     """Create/use a NE2001 lookup table for dispersion measure."""
 
+    # Name of the tabulated quantity in progress messages
+    quantity = 'DM'
+
     def __init__(self, test=False):
         """Initializing."""
         self.test = test
@@ -24,10 +51,9 @@ class NE2001Table:
         # Setup database
         self.db = False
         self.step = 0.1
-        self.rounding = 2
 
-        # For parallel processes
-        self.temp_path = None
+        # Number of longitudes handed to a worker at once
+        self.block_size = 10
 
         if self.test:
             self.step = 0.1
@@ -36,33 +62,55 @@ class NE2001Table:
 
         if os.path.exists(self.file_name) and self.test is False:
             self.db = True
+        else:
+            # Only one process builds the table, others wait for it
+            with TableLock(self.file_name):
+                self.setup_table()
+            self.db = True
+
+    def setup_table(self):
+        """Create the table, unless another process already has."""
+        if os.path.exists(self.file_name) and self.test is False:
+            return
+        elif (self.legacy_file_name and os.path.exists(self.legacy_file_name)
+              and self.test is False):
+            self.convert_legacy_table()
         else:
             # Calculations take quite some time
             # Provide a way for people to quit
             try:
                 self.create_table()
             except KeyboardInterrupt:
-                pprint('Losing all progress in calculations')
-                os.remove(self.file_name)
-                if self.temp:
-                    os.remove(self.temp_path)
+                pprint('Stopped calculations, finished blocks have been kept')
+                pprint('  - Rerun to resume where you left off')
                 sys.exit()
 
     def set_file_name(self):
         """Determine filename."""
         uni_mods = os.path.join(paths.models(), 'universe/')
-        self.file_name = uni_mods + 'dm_mw.db'
+        self.file_name = uni_mods + 'dm_mw.bin'
 
         if self.test:
             uni_mods = os.path.join(paths.models(), 'universe/')
-            self.file_name = uni_mods + 'test_dm_mw.db'
+            self.file_name = uni_mods + 'test_dm_mw.bin'
+
+        # Tables from older versions of frbpoppy
+        self.legacy_file_name = os.path.splitext(self.file_name)[0] + '.db'
+
+    def calc_block(self, gls, gbs, dist, path):
+        """Calculate a block of the table, see _calc_dm_block."""
+        _calc_dm_block(gls, gbs, dist, path)
 
     def create_table(self, parallel=True):
-        """Create a lookup table for dispersion measure."""
-        # Connect to database
-        conn = sqlite3.connect(self.file_name)
-        c = conn.cursor()
+        """Create a lookup table for dispersion measure.
+
+        The sky is split into blocks of Galactic longitude which are handed
+        out to a pool of worker processes. Each finished block is saved to a
+        checkpoint directory, allowing an interrupted run to be resumed.
 
+        Args:
+            parallel (bool): Whether to use all available cores.
+        """
         # Set array of coordinates
         gls = np.arange(-180., 180. + self.step, self.step).round(1)
         gbs = np.arange(-90., 90. + self.step, self.step).round(1)
@@ -71,109 +119,226 @@ class NE2001Table:
         gls = gls.astype(np.float32)
         gbs = gbs.astype(np.float32)
 
-        # Create database
-        c.execute('create table dm ' +
-                  '(gl real, gb real, dm_mw real)')
+        # Split up the sky into blocks of longitude
+        n_blocks = int(np.ceil(len(gls)/self.block_size))
+        blocks = np.array_split(gls, n_blocks)
+
+        # Finished blocks are kept in a checkpoint directory
+        block_dir = os.path.splitext(self.file_name)[0] + '_blocks/'
+        os.makedirs(block_dir, exist_ok=True)
+
+        def block_path(i):
+            return os.path.join(block_dir, f'block_{i:05d}.npy')
+
+        todo = [i for i in range(n_blocks) if not os.path.exists(block_path(i))]
 
         # Give an update on the progress
-        m = ['Creating a DM lookup table',
+        m = [f'Creating a {self.quantity} lookup table',
              '  - Only needs to happen once',
              '  - Unfortunately pretty slow',
-             '  - Prepare to wait for ~1.5h (4 cores)',
-             '  - Time given as [time_spent<time_left] in (hh:)mm:ss',
-             'Starting to calculate DM values']
+             '  - Prepare to wait ~1.5h on 4 cores, less with more cores',
+             '  - Progress is saved, so feel free to stop and resume later',
+             '  - Time given as [time_spent<time_left] in (hh:)mm:ss']
+        if len(todo) < n_blocks:
+            m.append(f'  - Resuming with {len(todo)}/{n_blocks} blocks to go')
+        m.append(f'Starting to calculate {self.quantity} values')
         for n in m:
             pprint(n)
 
-        n_opt = len(gls)*len(gbs)
-        options = np.array(np.meshgrid(gls, gbs)).T.reshape(-1, 2)
-        dm_mw = np.zeros(len(options)).astype(np.float32)
+        if parallel:
+            n_jobs = max(1, os.cpu_count() or 1)
+            Parallel(n_jobs=n_jobs)(
+                delayed(self.calc_block)(blocks[i], gbs, dist, block_path(i))
+                for i in tqdm(todo))
+        else:
+            for i in tqdm(todo):
+                self.calc_block(blocks[i], gbs, dist, block_path(i))
 
-        def dm_tot(i, dm_mw):
-            gl, gb = options[i]
-            dm_mw[i] = go.ne2001_dist_to_dm(dist, gl, gb)
+        # Gather all blocks into a (gl, gb) grid
+        grid = np.concatenate([np.load(block_path(i))
+                               for i in range(n_blocks)])
 
-        if parallel:
+        pprint('  - Saving results')
+        self.save_grid(grid)
+
+        # Checkpoints are no longer needed
+        shutil.rmtree(block_dir, ignore_errors=True)
+
+        pprint(f'Finished {self.quantity} table')
+
+    def save_grid(self, dm_mw):
+        """Save a (gl, gb) grid of DM values to a binary table."""
+        meta = {'table': 'ne2001_dm',
+                'gl_min': -180.,
+                'gb_min': -90.,
+                'step': self.step,
+                'dist': 0.1}
+        write_table(self.file_name, {'dm_mw': dm_mw.astype(np.float32)}, meta)
+
+    def convert_legacy_table(self):
+        """Convert a DM table from an SQLite database into a binary table."""
+        pprint('Converting DM table to the binary table format')
+        conn = sqlite3.connect(self.legacy_file_name)
+        c = conn.cursor()
+        rows = np.array(c.execute('select gl, gb, dm_mw from dm').fetchall(),
+                        dtype=np.float64)
+        conn.close()
 
-            temp_path = os.path.join(paths.models(), 'universe/') + 'temp.mmap'
-            self.temp_path = temp_path
+        # Place each row on its grid point
+        n_gl = int(round(360/self.step)) + 1
+        n_gb = int(round(180/self.step)) + 1
+        i = np.rint((rows[:, 0] + 180)/self.step).astype(np.intp)
+        j = np.rint((rows[:, 1] + 90)/self.step).astype(np.intp)
+        grid = np.full((n_gl, n_gb), np.nan, dtype=np.float32)
+        grid[i, j] = rows[:, 2]
 
-            # Make a temp memmap to have a sharedable memory object
-            temp = np.memmap(temp_path, dtype=dm_mw.dtype,
-                             shape=len(dm_mw),
-                             mode='w+')
+        self.save_grid(grid)
 
-            # Parallel process in order to populate array
-            r = range(n_opt)
-            j = min([4, os.cpu_count() - 1])
-            print(os.cpu_count())
-            Parallel(n_jobs=j)(delayed(dm_tot)(i, temp) for i in tqdm(r))
+    def load_columns(self):
+        """Memory-map the table once per process.
 
-            # Map results
-            r = np.concatenate((options, temp[:, np.newaxis]), axis=1)
-            results = map(tuple, r.tolist())
+        This allows all processes on a machine to share the same pages.
 
-            # Delete the temporary directory and contents
-            try:
-                os.remove(temp_path)
-            except FileNotFoundError:
-                print(f'Unable to remove {temp_path}')
+        Returns:
+            dict: Dense (gl, gb) grids by column name
 
-        else:
-            for i in tqdm(range(n_opt)):
-                dm_tot(i, dm_mw)
+        """
+        if self.file_name not in _ne2001_grids:
+            _ne2001_grids[self.file_name] = read_table(self.file_name)
 
-            # Save results to database
-            dm_mw = dm_mw.astype(np.float32)
-            r = np.concatenate((options, dm_mw[:, np.newaxis]), axis=1)
-            results = map(tuple, r.tolist())
+        columns, meta = _ne2001_grids[self.file_name]
+        self.step = meta['step']
 
-        pprint('  - Saving results')
-        c.executemany('insert into dm values (?,?,?)', results)
+        return columns
 
-        # Make for easier searching
-        c.execute('create index ix on dm (gl, gb)')
+    def load_grid(self):
+        """Load the DM table as a dense (gl, gb) grid.
 
-        # Save
-        conn.commit()
+        Returns:
+            array: Milky Way DM with shape (n_gl, n_gb) [pc*cm^-3]
 
-        pprint('Finished DM table')
+        """
+        return self.load_columns()['dm_mw']
 
-    def lookup(self, gal, gab):
+    def interpolate(self, grid, gal, gab, method='nearest'):
+        """Get values from a (gl, gb) grid at the given coordinates.
+
+        Args:
+            grid (array): Grid with shape (n_gl, n_gb)
+            gal (array): Galactic longitude [fractional degrees]
+            gab (array): Galactic latitude [fractional degrees]
+            method (str): Either 'nearest' to take the closest grid point or
+                'bilinear' to interpolate between the surrounding points.
+
+        Returns:
+            array: Grid values
+
+        """
+        n_gl, n_gb = grid.shape
+
+        # Fractional grid indices
+        x = (np.asarray(gal, dtype=np.float64) + 180)/self.step
+        y = (np.asarray(gab, dtype=np.float64) + 90)/self.step
+        x = np.clip(x, 0, n_gl - 1)
+        y = np.clip(y, 0, n_gb - 1)
+
+        if method == 'nearest':
+            i = np.rint(x).astype(np.intp)
+            j = np.rint(y).astype(np.intp)
+            return grid[i, j]
+        elif method == 'bilinear':
+            i = np.minimum(x.astype(np.intp), n_gl - 2)
+            j = np.minimum(y.astype(np.intp), n_gb - 2)
+            fx = (x - i).astype(np.float32)
+            fy = (y - j).astype(np.float32)
+            values = grid[i, j]*(1 - fx)*(1 - fy)
+            values += grid[i + 1, j]*fx*(1 - fy)
+            values += grid[i, j + 1]*(1 - fx)*fy
+            values += grid[i + 1, j + 1]*fx*fy
+            return values
+        else:
+            raise ValueError('lookup method not recognised')
+
+    def lookup(self, gal, gab, method='nearest'):
         """Look up associated milky way dispersion measure with gal coords.
 
         Args:
             gl (array): Galactic longitude [fractional degrees]
             gb (array): Galactic latitude [fractional degrees]
+            method (str): Either 'nearest' to take the closest grid point or
+                'bilinear' to interpolate between the surrounding points.
 
         Returns:
-            dm_mw (float): Galactic dispersion measure [pc*cm^-3]
+            dm_mw (array): Galactic dispersion measure [pc*cm^-3]
 
         """
-        # Connect to database
-        conn = sqlite3.connect(self.file_name)
-        c = conn.cursor()
+        return self.interpolate(self.load_grid(), gal, gab, method=method)
+
+
+class NE2001ScatTable(NE2001Table):
+    """Create/use a NE2001 lookup table for scattering measures.
+
+    Tabulates the scattering measures SM and SMtau up to 100 kpc, the
+    distance at which NE2001 calculations are cut, so covers any source
+    beyond the Milky Way.
+    """
 
-        dm_mw = np.ones_like(gal)
+    quantity = 'SM'
 
-        # Round values
-        def frac_round(x, prec=self.rounding, base=1):
-            return np.round(base * np.round(x/base), prec)
+    def set_file_name(self):
+        """Determine filename."""
+        uni_mods = os.path.join(paths.models(), 'universe/')
+        self.file_name = uni_mods + 'sm_mw.bin'
 
-        # Round values
-        gal = frac_round(gal, self.rounding)
-        gab = frac_round(gab, self.rounding)
+        if self.test:
+            self.file_name = uni_mods + 'test_sm_mw.bin'
 
-        # Search database
-        query = 'select dm_mw from dm where gl=? and gb=? limit 1'
+        # Older versions of frbpoppy didn't have this table
+        self.legacy_file_name = None
 
-        for i, gl in enumerate(gal):
-            dm_mw[i] = c.execute(query, [str(gl), str(gab[i])]).fetchone()[0]
+    def calc_block(self, gls, gbs, dist, path):
+        """Calculate a block of the table, see _calc_sm_block."""
+        _calc_sm_block(gls, gbs, dist, path)
 
-        # Close database
-        conn.close()
+    def save_grid(self, grid):
+        """Save a (gl, gb, 2) grid of SM and SMtau values to a binary table."""
+        meta = {'table': 'ne2001_sm',
+                'gl_min': -180.,
+                'gb_min': -90.,
+                'step': self.step,
+                'dist': 0.1}
+        columns = {'sm': grid[..., 0].astype(np.float32),
+                   'smtau': grid[..., 1].astype(np.float32)}
+        write_table(self.file_name, columns, meta)
+
+    def load_grid(self):
+        """Load the SM and SMtau tables as dense (gl, gb) grids.
+
+        Returns:
+            array, array: Scattering measures with shape (n_gl, n_gb)
+
+        """
+        columns = self.load_columns()
+        return columns['sm'], columns['smtau']
+
+    def lookup(self, gal, gab, method='nearest'):
+        """Look up the Milky Way scattering measures with gal coords.
 
-        return dm_mw
+        Args:
+            gl (array): Galactic longitude [fractional degrees]
+            gb (array): Galactic latitude [fractional degrees]
+            method (str): Either 'nearest' or 'bilinear', see
+                NE2001Table.interpolate.
+
+        Returns:
+            sm (array): Scattering measure
+            smtau (array): Scattering measure for the scattering time
+
+        """
+        sm, smtau = self.load_grid()
+        sm = self.interpolate(sm, gal, gab, method=method)
+        smtau = self.interpolate(smtau, gal, gab, method=method)
+        return sm, smtau
 
 
 class DistanceTable:
@@ -188,6 +353,10 @@ class DistanceTable:
     table, and save the table for later runs. Covers z, dist, vol, dvol,
     cdf_sfr and cdf_smd.
 
+    Once read, tables are kept in memory for the rest of the process, so
+    repeatedly setting up the same cosmology only reads the table once. At
+    most cache_size cosmologies are kept in memory at the same time.
+
     Args:
         H_0 (float, optional): Hubble parameter. Defaults to 67.74 km/s/Mpc
         W_m (float, optional): Omega matter. Defaults to 0.3089
@@ -195,6 +364,9 @@ class DistanceTable:
 
     """
 
+    # Maximum number of cosmologies to keep in memory
+    cache_size = 8
+
     def __init__(self, H_0=67.74, W_m=0.3089, W_v=0.6911, test=False):
         """Initializing."""
         self.H_0 = H_0
@@ -209,14 +381,35 @@ class DistanceTable:
         self.step = 0.00001
         self.z_max = 6.5
 
+        # Table values, read in upon the first lookup
+        self.columns = None
+        self.key = (float(H_0), float(W_m), float(W_v))
+
         if self.test:
             self.step = 0.001
             self.z_max = 6.5
             if os.path.exists(self.file_name):
                 os.remove(self.file_name)
 
-        if os.path.exists(self.file_name) and self.test is False:
+        if self.key in _distance_tables and self.test is False:
+            # Reuse the arrays another instance has already read in
+            _distance_tables.move_to_end(self.key)
+            self.columns = _distance_tables[self.key]
+            self.db = True
+        elif os.path.exists(self.file_name) and self.test is False:
             self.db = True
+        else:
+            # Only one process builds the table, others wait for it
+            with TableLock(self.file_name):
+                self.setup_table()
+            self.db = True
+
+    def setup_table(self):
+        """Create the table, unless another process already has."""
+        if os.path.exists(self.file_name) and self.test is False:
+            return
+        elif os.path.exists(self.legacy_file_name) and self.test is False:
+            self.convert_legacy_table()
         else:
             # Calculations take quite some time
             # Provide a way for people to quit
@@ -224,7 +417,6 @@ class DistanceTable:
                 self.create_table()
             except KeyboardInterrupt:
                 pprint('Losing all progress in calculations')
-                os.remove(self.file_name)
                 sys.exit()
 
     def set_file_name(self):
@@ -241,23 +433,22 @@ class DistanceTable:
                  'wv', cvt(self.W_v)]
         f = '-'.join(paras)
 
-        self.file_name = uni_mods + f'{f}.db'
+        self.file_name = uni_mods + f'{f}.bin'
 
         if self.test:
-            self.file_name = uni_mods + 'cosmo_test.db'
+            self.file_name = uni_mods + 'cosmo_test.bin'
+
+        # Tables from older versions of frbpoppy
+        self.legacy_file_name = os.path.splitext(self.file_name)[0] + '.db'
 
     def create_table(self):
         """Create a lookup table for distances."""
         m = ['Creating a distance table',
              '  - Only needs to happen once',
-             '  - May take up to 2m on a single core']
+             '  - Should only take a few seconds']
         for n in m:
             pprint(n)
 
-        # Connect to database
-        conn = sqlite3.connect(self.file_name)
-        c = conn.cursor()
-
         H_0 = self.H_0
         W_m = self.W_m
         W_v = self.W_v
@@ -269,17 +460,9 @@ class DistanceTable:
 
         zs = np.arange(0, self.z_max+self.step, self.step)
 
-        # Create database
-        t = 'real'
-        par = f'(z {t}, dist {t}, vol {t}, dvol {t}, cdf_sfr {t}, cdf_smd {t})'
-        s = f'create table distances {par}'
-        c.execute(s)
-
-        results = []
-
         pprint('  - Calculating parameters at various redshifts')
         conv = go.Redshift(zs, H_0=H_0, W_m=W_m, W_v=W_v)
-        dists = conv.dist_co()
+        dists = conv.dist_co_grid()
         vols = conv.vol_co()
 
         # Get dV
@@ -294,39 +477,82 @@ class DistanceTable:
 
         pprint('  - Calculating Stellar Mass Density')
         # Get pdf csmd
-        pdf_smd = smd(zs, H_0=H_0, W_m=W_m, W_v=W_v)*dvols
+        pdf_smd = smd_grid(zs, H_0=H_0, W_m=W_m, W_v=W_v)*dvols
         cdf_smd = np.cumsum(pdf_smd)  # Unnormalized
         cdf_smd /= cdf_smd[-1]
 
-        results = np.stack((zs, dists, vols, dvols, cdf_sfr, cdf_smd)).T
+        pprint('  - Saving values to table')
+        columns = {'z': zs,
+                   'dist': dists,
+                   'vol': vols,
+                   'dvol': dvols,
+                   'cdf_sfr': cdf_sfr,
+                   'cdf_smd': cdf_smd}
+        self.save_columns(columns)
+
+        pprint('Finished distance table')
+
+    def save_columns(self, columns):
+        """Save the distance table columns to a binary table."""
+        meta = {'table': 'distance',
+                'H_0': self.H_0,
+                'W_m': self.W_m,
+                'W_v': self.W_v,
+                'z_max': self.z_max,
+                'step': self.step}
+        columns = {k: np.asarray(v, dtype=np.float64)
+                   for k, v in columns.items()}
+        write_table(self.file_name, columns, meta)
+
+    def convert_legacy_table(self):
+        """Convert a distance table from SQLite into a binary table."""
+        pprint('Converting distance table to the binary table format')
+        conn = sqlite3.connect(self.legacy_file_name)
+        c = conn.cursor()
+        rows = c.execute('select * from distances order by z').fetchall()
+        conn.close()
 
-        pprint('  - Saving values to database')
-        # Save results to database
-        data = map(tuple, results.tolist())
-        c.executemany('insert into distances values (?,?,?,?,?,?)', data)
+        keys = ('z', 'dist', 'vol', 'dvol', 'cdf_sfr', 'cdf_smd')
+        rows = np.array(rows, dtype=np.float64)
+        self.save_columns({k: rows[:, i] for i, k in enumerate(keys)})
 
-        # Make for easier searching
-        # I don't really understand SQL index names...
-        c.execute('create index ix on distances (z)')
-        c.execute('create index ixx on distances (dist)')
-        c.execute('create index ixxx on distances (vol)')
-        c.execute('create index ixxxx on distances (dvol)')
-        c.execute('create index ixxxxx on distances (cdf_sfr)')
-        c.execute('create index ixxxxxx on distances (cdf_smd)')
+    def load_columns(self):
+        """Memory-map the distance table.
 
-        # Save
-        conn.commit()
+        Returns:
+            dict: Arrays of z, dist, vol, dvol, cdf_sfr and cdf_smd
 
-        pprint('Finished distance table')
+        """
+        if self.columns is not None:
+            return self.columns
+
+        self.columns, _ = read_table(self.file_name)
+
+        # Share with other instances, dropping the least recently used table
+        # if over the size limit
+        if not self.test:
+            _distance_tables[self.key] = self.columns
+            while len(_distance_tables) > self.cache_size:
+                _distance_tables.popitem(last=False)
+
+        return self.columns
+
+    @staticmethod
+    def clear_cache():
+        """Remove all distance tables held in memory."""
+        _distance_tables.clear()
 
     def lookup(self, z=None, dist_co=None, vol_co=None, dvol_co=None,
-               cdf_sfr=None, cdf_smd=None):
-        """Look up associated values with input values."""
-        # Connect to database
-        conn = sqlite3.connect(self.file_name)
-        c = conn.cursor()
+               cdf_sfr=None, cdf_smd=None, interpolate=False):
+        """Look up associated values with input values.
+
+        By default returns the values of the first table row above each input
+        value. Set interpolate to True to linearly interpolate between the
+        table rows on either side instead.
+        """
+        columns = self.load_columns()
 
-        # Check what's being looked up, set all other keywords to same length
+        # Check what's being looked up
         kw = {'z': z,
               'dist':  dist_co,
               'vol': vol_co,
@@ -339,27 +565,209 @@ class DistanceTable:
                 in_par = key
                 break
 
-        for key, value in kw.items():
-            if key != in_par:
-                kw[key] = np.ones_like(kw[in_par])
+        values = np.asarray(kw[in_par])
 
-        keys = list(kw.keys())
+        # Not all columns rise monotonically (dvol), so search on the running
+        # maximum to find the first row above each value
+        col = columns[in_par]
+        if in_par == 'dvol':
+            col = np.maximum.accumulate(col)
 
-        # Search database
-        query = f'select * from distances where {in_par} > ? limit 1'
+        if interpolate:
+            for key in kw:
+                if key != in_par:
+                    kw[key] = np.interp(values, col, columns[key])
+        else:
+            ix = np.searchsorted(col, values, side='right')
+            ix = np.minimum(ix, len(col) - 1)
+            for key in kw:
+                if key != in_par:
+                    kw[key] = columns[key][ix]
 
-        for i, r in enumerate(kw[in_par]):
-            d = c.execute(query, [str(r)]).fetchone()
-            for ii, key in enumerate(keys):
-                if key == in_par:
-                    continue
+        return list(kw.values())
 
-                kw[key][i] = d[ii]
 
-        # Close database
-        conn.close()
+def _aligned(n):
+    """Round a number of bytes up to the table alignment."""
+    return -(-n // TABLE_ALIGN) * TABLE_ALIGN
+
+
+class TableLock:
+    """Inter-process lock for creating a lookup table.
+
+    Uses an advisory lock on a file next to the table, so processes on the
+    same machine (or sharing a filesystem) wait for each other instead of
+    building the same table in parallel.
+
+    Args:
+        path (str): Path to the table to be locked
+        poll (float): Seconds between attempts if fcntl isn't available
+    """
+
+    def __init__(self, path, poll=1.):
+        """Initializing."""
+        self.path = path + '.lock'
+        self.poll = poll
+        self.fd = None
+
+    def __enter__(self):
+        """Block until the lock is acquired."""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+
+        if fcntl is not None:
+            self.fd = os.open(self.path, os.O_CREAT | os.O_RDWR)
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+            return self
+
+        # Fall back on the atomic creation of the lock file
+        waiting = False
+        while True:
+            try:
+                flags = os.O_CREAT | os.O_EXCL | os.O_RDWR
+                self.fd = os.open(self.path, flags)
+                return self
+            except FileExistsError:
+                if not waiting:
+                    pprint('Waiting for another process to create table')
+                    pprint(f'  - Remove {self.path} if no process is')
+                    waiting = True
+                time.sleep(self.poll)
+
+    def __exit__(self, *args):
+        """Release the lock."""
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+            os.close(self.fd)
+        else:
+            os.close(self.fd)
+            os.remove(self.path)
+        self.fd = None
 
-        return list(kw.values())
+
+def write_table(path, columns, meta=None):
+    """Write arrays to a binary lookup table.
+
+    A table consists of the magic bytes, the format version and the length of
+    a JSON header, followed by the header itself. The header describes the
+    dtype, shape and offset of each array, any metadata (grid specification,
+    cosmology, ...) and a CRC32 checksum of the data. The raw arrays follow,
+    each aligned to TABLE_ALIGN bytes, so they can be memory-mapped directly.
+
+    Args:
+        path (str): Where to write the table
+        columns (dict): Arrays to save, by name
+        meta (dict): Any JSON serialisable metadata
+    """
+    columns = {k: np.ascontiguousarray(v) for k, v in columns.items()}
+
+    # Offsets are relative to the start of the data
+    header = {'version': TABLE_VERSION, 'columns': {}, 'meta': meta or {}}
+    offsets = {}
+    offset = 0
+    checksum = 0
+    for name, array in columns.items():
+        offsets[name] = offset
+        header['columns'][name] = {'dtype': array.dtype.str,
+                                   'shape': list(array.shape),
+                                   'offset': offset}
+        offset = _aligned(offset + array.nbytes)
+        checksum = zlib.crc32(array.tobytes(), checksum)
+    header['checksum'] = checksum
+
+    header = json.dumps(header).encode()
+    preamble = TABLE_MAGIC + struct.pack('<II', TABLE_VERSION, len(header))
+    start = _aligned(len(preamble) + len(header))
+
+    # Write to a temporary file first so other processes never see a
+    # partially written table. Unlike tempfile.mkstemp, this leaves the
+    # table readable by other users following the umask
+    temp_path = f'{path}.{os.getpid()}.{uuid.uuid4().hex}.part'
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(preamble + header)
+            for name, array in columns.items():
+                f.seek(start + offsets[name])
+                f.write(array.tobytes())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def read_table(path, verify=False):
+    """Memory-map the arrays in a binary lookup table.
+
+    Args:
+        path (str): Path to table
+        verify (bool): Whether to check the data against its checksum. Note
+            this reads in the full table.
+
+    Returns:
+        dict, dict: Read-only arrays by name, table metadata
+
+    """
+    with open(path, 'rb') as f:
+        magic = f.read(len(TABLE_MAGIC))
+        if magic != TABLE_MAGIC:
+            raise ValueError(f'{path} is not a frbpoppy table')
+        version, n_header = struct.unpack('<II', f.read(8))
+        if version > TABLE_VERSION:
+            m = f'{path} has table version {version}, '
+            m += f'this frbpoppy only reads up to {TABLE_VERSION}'
+            raise ValueError(m)
+        header = json.loads(f.read(n_header))
+
+    start = _aligned(len(TABLE_MAGIC) + 8 + n_header)
+
+    columns = {}
+    checksum = 0
+    for name, c in header['columns'].items():
+        shape = tuple(c['shape'])
+        columns[name] = np.memmap(path, dtype=np.dtype(c['dtype']), mode='r',
+                                  offset=start + c['offset'], shape=shape)
+        if verify:
+            checksum = zlib.crc32(columns[name].tobytes(), checksum)
+
+    if verify and checksum != header['checksum']:
+        raise ValueError(f'{path} does not match its checksum')
+
+    return columns, header['meta']
+
+
+def _calc_dm_block(gls, gbs, dist, path):
+    """Calculate the Milky Way DM for a block of the sky and save it.
+
+    Args:
+        gls (array): Galactic longitudes in block [fractional degrees]
+        gbs (array): Galactic latitudes in block [fractional degrees]
+        dist (float): Distance up to which to integrate [Gpc]
+        path (str): Where to save the (gl, gb) block
+    """
+    dm_mw = go.ne2001_dist_to_dm_arr(dist, gls[:, np.newaxis], gbs)
+    _save_block(dm_mw, path)
+
+
+def _calc_sm_block(gls, gbs, dist, path):
+    """Calculate the Milky Way SM and SMtau for a block of the sky and save it.
+
+    Args:
+        gls (array): Galactic longitudes in block [fractional degrees]
+        gbs (array): Galactic latitudes in block [fractional degrees]
+        dist (float): Distance up to which to integrate [Gpc]
+        path (str): Where to save the (gl, gb, 2) block
+    """
+    sm, smtau = go.ne2001_get_smtau(dist*1e6, gls[:, np.newaxis], gbs)
+    _save_block(np.stack((sm, smtau), axis=-1), path)
+
+
+def _save_block(block, path):
+    """Save a block of a table, only counting it as finished once written."""
+    temp_path = path + '.part'
+    with open(temp_path, 'wb') as f:
+        np.save(f, block)
+    os.replace(temp_path, path)
 
 
 def sfr(z):
@@ -371,19 +779,43 @@ def sfr(z):
     return (1+z)**2.7/(1+((1+z)/2.9)**5.6)
 
 
+def _smd_integrand(z, H_0=67.74, W_m=0.3089, W_v=0.6911):
+    """Integrand of the Stellar Mass Density."""
+    z1 = z + 1
+    return z1**1.7/(1+(z1/2.9)**5.6)*(1/(H_0*(W_m*z1**3+W_v)**0.5))
+
+
 def smd(z, H_0=67.74, W_m=0.3089, W_v=0.6911):
     """Return the number density of Stellar Mass Density at redshift z.
 
     Follows Madau & Dickinson (2014), eq. 2 & 15. For more info see
     https://arxiv.org/pdf/1403.0007.pdf
     """
-    def integral(z):
-        z1 = z + 1
-        return z1**1.7/(1+(z1/2.9)**5.6)*(1/(H_0*(W_m*z1**3+W_v)**0.5))
-
     def csmd(z):
-        return 0.01095*quad(integral, z, np.inf)[0]
+        return 0.01095*quad(_smd_integrand, z, np.inf,
+                            args=(H_0, W_m, W_v))[0]
 
     vec_csmd = np.vectorize(csmd)
 
     return vec_csmd(z)
+
+
+def smd_grid(z, H_0=67.74, W_m=0.3089, W_v=0.6911):
+    """Return the Stellar Mass Density along a sorted grid of redshifts.
+
+    Same as smd, but rather than integrating to infinity for every redshift,
+    integrates once from the highest redshift onwards, and then works its way
+    down the grid in a single reverse cumulative pass (trapezoidal rule).
+    """
+    z = np.asarray(z, dtype=np.float64)
+    f = _smd_integrand(z, H_0=H_0, W_m=W_m, W_v=W_v)
+
+    # Integral beyond the grid
+    tail = quad(_smd_integrand, z[-1], np.inf, args=(H_0, W_m, W_v))[0]
+
+    # Integral from each grid point up to the last one
+    steps = 0.5*(f[1:] + f[:-1])*np.diff(z)
+    integral = np.zeros_like(z)
+    integral[:-1] = np.cumsum(steps[::-1])[::-1]
+
+    return 0.01095*(integral + tail)
@@ -0,0 +1,271 @@
+"""Ragged storage of burst properties for repeater populations."""
+import numpy as np
+from numpy.lib.mixins import NDArrayOperatorsMixin
+
+# Numpy functions with an implementation for ragged arrays
+_FUNCS = {}
+
+
+def implements(func):
+    """Register an implementation of a numpy function for ragged arrays."""
+    def decorator(impl):
+        _FUNCS[func] = impl
+        return impl
+    return decorator
+
+
+class Ragged(NDArrayOperatorsMixin):
+    """Values per burst, stored flat with offsets per source.
+
+    The bursts of source i are values[offsets[i]:offsets[i+1]], so no space
+    is spent on padding sources with few bursts to the length of the most
+    active one. Arithmetic behaves as on a NaN-padded (n_srcs, n_bursts)
+    array, with per-source values given in a (n_srcs, 1) shape.
+    """
+
+    ndim = 2
+
+    def __init__(self, values, offsets):
+        """Set up a ragged array.
+
+        Args:
+            values (array): Values of all bursts, ordered by source.
+            offsets (array): Index of the first burst of each source, with
+                the total number of bursts appended.
+        """
+        self.values = np.asarray(values)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self._rows = None
+
+    @classmethod
+    def from_counts(cls, values, counts):
+        """Set up a ragged array from the number of bursts per source."""
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return cls(values, offsets)
+
+    @classmethod
+    def from_padded(cls, padded):
+        """Convert a NaN-padded 2D array, keeping all non-NaN values."""
+        mask = ~np.isnan(padded)
+        return cls.from_counts(padded[mask], np.count_nonzero(mask, 1))
+
+    def to_padded(self, fill=np.nan):
+        """Convert to a left-justified 2D array padded with fill values."""
+        dtype = np.result_type(self.values, fill)
+        padded = np.full(self.shape, fill, dtype=dtype)
+        padded[self.rows(), self.cols()] = self.values
+        return padded
+
+    @property
+    def n_srcs(self):
+        """Number of sources."""
+        return self.offsets.size - 1
+
+    @property
+    def shape(self):
+        """Shape of the equivalent padded array."""
+        counts = self.counts()
+        return (self.n_srcs, int(counts.max()) if counts.size else 0)
+
+    @property
+    def size(self):
+        """Number of bursts."""
+        return self.values.size
+
+    @property
+    def dtype(self):
+        """Data type of the values."""
+        return self.values.dtype
+
+    def __len__(self):
+        """Number of sources."""
+        return self.n_srcs
+
+    def __repr__(self):
+        """Show values and offsets."""
+        return f'Ragged({self.values!r}, offsets={self.offsets!r})'
+
+    def counts(self):
+        """Number of bursts per source."""
+        return np.diff(self.offsets)
+
+    def rows(self):
+        """Source index of each burst."""
+        if self._rows is None:
+            self._rows = np.repeat(np.arange(self.n_srcs), self.counts())
+        return self._rows
+
+    def cols(self):
+        """Index of each burst within its source."""
+        return np.arange(self.size) - self.offsets[:-1][self.rows()]
+
+    def like(self, values):
+        """Ragged array with other values for the same bursts."""
+        new = Ragged(values, self.offsets)
+        new._rows = self._rows
+        return new
+
+    def copy(self):
+        """Copy of the ragged array."""
+        return self.like(self.values.copy())
+
+    def astype(self, dtype):
+        """Ragged array with values cast to a data type."""
+        return self.like(self.values.astype(dtype))
+
+    def sum(self, axis=None):
+        """Sum of values in total or per source (axis=1)."""
+        if axis is None:
+            return self.values.sum()
+        if axis not in (1, -1):
+            raise ValueError('Ragged arrays can only be summed per source')
+        # Reduce each source separately, sources without bursts sum to 0
+        totals = np.zeros(self.n_srcs, dtype=np.sum(self.values[:0]).dtype)
+        filled = self.counts() > 0
+        if filled.any():
+            totals[filled] = np.add.reduceat(self.values,
+                                             self.offsets[:-1][filled],
+                                             dtype=totals.dtype)
+        return totals
+
+    def flatten(self):
+        """Values of all bursts."""
+        return self.values.copy()
+
+    def any(self, axis=None):
+        """Whether any value per source is True, or any value at all."""
+        if axis is None:
+            return self.values.any()
+        return count_nonzero(self, axis=1) > 0
+
+    def sources(self, ix):
+        """Select sources by a boolean mask or indices.
+
+        Args:
+            ix (array): Boolean mask or indices over sources.
+
+        Returns:
+            Ragged: Bursts of the selected sources
+
+        """
+        ix = np.asarray(ix)
+        if ix.dtype == bool:
+            ix = np.flatnonzero(ix)
+        counts = self.counts()[ix]
+        offsets = np.zeros(counts.size + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        # Shift the new position of each burst to its old one
+        shift = np.repeat(self.offsets[:-1][ix] - offsets[:-1], counts)
+        return Ragged(self.values[np.arange(offsets[-1]) + shift], offsets)
+
+    def bursts(self, mask):
+        """Select bursts with a boolean mask, keeping all sources.
+
+        Args:
+            mask (array): Boolean mask over the flat values.
+
+        Returns:
+            Ragged: Selected bursts
+
+        """
+        kept = np.zeros(self.size + 1, dtype=np.int64)
+        np.cumsum(mask, out=kept[1:])
+        return Ragged(self.values[mask], kept[self.offsets])
+
+    def __getitem__(self, key):
+        """Select sources, bursts, or values at (source, burst) indices.
+
+        A tuple of source indices and flat burst indices, as returned by
+        survey_pop.fast_where, gives the values of those bursts.
+        """
+        if isinstance(key, tuple):
+            return self.values[np.asarray(key[1], dtype=np.int64)]
+        if isinstance(key, Ragged):
+            return self.bursts(key.values)
+        return self.sources(key)
+
+    def __setitem__(self, key, value):
+        """Set values at (source, burst) indices or by a ragged mask."""
+        if isinstance(key, tuple):
+            key = np.asarray(key[1], dtype=np.int64)
+        elif isinstance(key, Ragged):
+            key = key.values
+        else:
+            raise IndexError('Ragged arrays only support setting bursts')
+        self.values[key] = value
+
+    def _flat(self, x):
+        """Express an operand as values per burst."""
+        if isinstance(x, Ragged):
+            if x.offsets is not self.offsets and not np.array_equal(
+                    x.offsets, self.offsets):
+                raise ValueError('Ragged arrays have different bursts')
+            return x.values
+        x = np.asarray(x)
+        if x.ndim == 0:
+            return x
+        if x.shape == (self.n_srcs, 1):
+            return x[self.rows(), 0]
+        raise ValueError(f'Cannot broadcast shape {x.shape} over bursts, '
+                         'give per-source values in shape (n_srcs, 1)')
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        """Apply element-wise numpy functions to the values per burst."""
+        if method != '__call__':
+            return NotImplemented
+        out = kwargs.get('out')
+        if out is not None:
+            kwargs['out'] = tuple(self._flat(o) for o in out)
+        result = ufunc(*(self._flat(x) for x in inputs), **kwargs)
+        if out is not None:
+            return out[0] if len(out) == 1 else out
+        if isinstance(result, tuple):
+            return tuple(self.like(r) for r in result)
+        return self.like(result)
+
+    def __array_function__(self, func, types, args, kwargs):
+        """Dispatch supported numpy functions to ragged implementations."""
+        if func not in _FUNCS:
+            return NotImplemented
+        return _FUNCS[func](*args, **kwargs)
+
+
+@implements(np.count_nonzero)
+def count_nonzero(a, axis=None):
+    """Count nonzero values in total or per source (axis=1)."""
+    return (a != 0).sum(axis=axis)
+
+
+@implements(np.full_like)
+def full_like(a, fill_value, dtype=None):
+    """Ragged array of a constant value for the same bursts."""
+    return a.like(np.full_like(a.values, fill_value, dtype=dtype))
+
+
+@implements(np.zeros_like)
+def zeros_like(a, dtype=None):
+    """Ragged array of zeros for the same bursts."""
+    return a.like(np.zeros_like(a.values, dtype=dtype))
+
+
+@implements(np.concatenate)
+def concatenate(arrays, axis=0):
+    """Join the sources of ragged arrays."""
+    if axis != 0:
+        raise ValueError('Ragged arrays can only be joined along sources')
+    counts = [a.counts() for a in arrays]
+    values = [a.values for a in arrays]
+    return Ragged.from_counts(np.concatenate(values), np.concatenate(counts))
+
+
+@implements(np.sum)
+def ragged_sum(a, axis=None):
+    """Sum of values in total or per source (axis=1)."""
+    return a.sum(axis=axis)
+
+
+@implements(np.nansum)
+def ragged_nansum(a, axis=None):
+    """Sum of non-NaN values in total or per source (axis=1)."""
+    return a.like(np.where(np.isnan(a.values), 0, a.values)).sum(axis=axis)
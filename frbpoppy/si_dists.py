@@ -2,21 +2,23 @@
 import numpy as np
 
 
-def constant(value=-1.4, shape=1):
+def constant(value=-1.4, shape=1, rng=None):
     """Good for adopting a single value."""
     return np.full(shape, value).astype(np.float32)
 
 
-def gauss(mean=-1.4, std=1, shape=1):
+def gauss(mean=-1.4, std=1, shape=1, rng=None):
     """Generate spectral indices from a Gaussian distribution.
 
     Args:
         mean (float): Mean spectral index
         std (float): Spread of spectral index
         shape (tuple): Required array shape
+        rng (Generator): Random number generator. Defaults to a new one.
 
     Returns:
         array: spectral indices
 
     """
-    return np.random.normal(mean, std, shape).astype(np.float32)
+    rng = np.random.default_rng(rng)
+    return rng.normal(mean, std, shape).astype(np.float32)
@@ -0,0 +1,168 @@
+"""Equal-area pixels on the sky for looking up direction-dependent values."""
+import numpy as np
+
+import frbpoppy.galacticops as go
+import frbpoppy.precalc as pc
+
+# Pixelizations by number of rows, shared between populations
+_skies = {}
+
+# Steps of the R2 low-discrepancy sequence, placing sources within pixels
+R2 = 1.32471795724474602596
+R2_STEPS = (1/R2, 1/R2**2)
+
+
+def get_sky(n_dec=1024):
+    """Get the sky pixelization with a number of pixel rows.
+
+    Args:
+        n_dec (int): Number of rows in declination.
+
+    Returns:
+        SkyPixels: Shared sky pixelization
+
+    """
+    n_dec = int(n_dec)
+    if n_dec not in _skies:
+        _skies[n_dec] = SkyPixels(n_dec)
+    return _skies[n_dec]
+
+
+class SkyPixels:
+    """Equal-area pixels in rows of sin(Dec) and columns of RA.
+
+    Values depending on the direction are calculated once for the pixel
+    centres, after which finding them for sources is a matter of indexing.
+    """
+
+    def __init__(self, n_dec=1024):
+        """Set up n_dec rows of 2*n_dec pixels.
+
+        Args:
+            n_dec (int): Number of rows in declination.
+        """
+        self.n_dec = int(n_dec)
+        self.n_ra = 2*self.n_dec
+        self.n_pix = self.n_ra*self.n_dec
+        self.maps = {}
+
+    def __getstate__(self):
+        """Leave out pixel values when pickling, they're recalculated."""
+        state = self.__dict__.copy()
+        state['maps'] = {}
+        return state
+
+    def draw(self, n_srcs=1, pixels=None, rng=None):
+        """Draw pixels uniformly over the sky.
+
+        Args:
+            n_srcs (int): Number of sources for which to draw.
+            pixels (array): Only draw from these pixels. Defaults to all.
+            rng (Generator): Random number generator. Defaults to a new one.
+
+        Returns:
+            array: Pixel indices
+
+        """
+        rng = np.random.default_rng(rng)
+        if pixels is None:
+            return rng.integers(self.n_pix, size=n_srcs, dtype=np.int32)
+        return pixels[rng.integers(pixels.size, size=n_srcs)]
+
+    def pix_to_radec(self, pix, u_ra=0.5, u_dec=0.5):
+        """Convert pixel indices to directions within the pixels.
+
+        Args:
+            pix (array): Pixel indices.
+            u_ra (array): Position within the pixel along RA [0-1].
+            u_dec (array): Position within the pixel along sin(Dec) [0-1].
+
+        Returns:
+            tuple: RA, Dec arrays [frac deg]
+
+        """
+        i_dec, i_ra = np.divmod(pix, self.n_ra)
+        ra = (i_ra + u_ra)*(360/self.n_ra)
+        sin_dec = (i_dec + u_dec)*(2/self.n_dec) - 1
+        dec = np.rad2deg(np.arcsin(np.clip(sin_dec, -1, 1)))
+        return ra, dec
+
+    def radec_to_pix(self, ra, dec):
+        """Find the pixels in which directions lie.
+
+        Args:
+            ra (array): Right ascension [frac deg]
+            dec (array): Declination [frac deg]
+
+        Returns:
+            array: Pixel indices
+
+        """
+        i_ra = (np.asarray(ra) % 360)*(self.n_ra/360)
+        i_ra = np.minimum(i_ra.astype(np.int32), self.n_ra - 1)
+        i_dec = (np.sin(np.deg2rad(dec)) + 1)*(self.n_dec/2)
+        i_dec = np.minimum(i_dec.astype(np.int32), self.n_dec - 1)
+        return i_dec*self.n_ra + i_ra
+
+    def centres(self):
+        """Get the directions of the pixel centres.
+
+        Returns:
+            tuple: RA, Dec, Galactic longitude and latitude [frac deg]
+
+        """
+        if 'centres' not in self.maps:
+            ra, dec = self.pix_to_radec(np.arange(self.n_pix))
+            gl, gb = go.radec_to_lb(ra, dec, frac=True)
+            coords = (ra, dec, gl, gb)
+            self.maps['centres'] = tuple(c.astype(np.float32) for c in coords)
+        return self.maps['centres']
+
+    def pix_map(self, name, func):
+        """Get values per pixel, calculating them upon first use.
+
+        Args:
+            name (str): Name under which to keep the values.
+            func (function): Function of the RA, Dec, Galactic longitude and
+                latitude of the pixel centres [frac deg].
+
+        Returns:
+            array: Values per pixel
+
+        """
+        if name not in self.maps:
+            ra, dec, gl, gb = self.centres()
+            self.maps[name] = func(ra, dec, gl.copy(), gb)
+        return self.maps[name]
+
+    def ne2001_dm(self, **kwargs):
+        """Milky Way dispersion measure per pixel, see NE2001Table.lookup."""
+        return self.pix_map(f'dm_mw_{sorted(kwargs.items())}',
+                            lambda ra, dec, gl, gb:
+                            pc.NE2001Table().lookup(gl, gb, **kwargs))
+
+    def ne2001_sm(self):
+        """Milky Way scattering measures per pixel, see NE2001ScatTable."""
+        return self.pix_map('sm', lambda ra, dec, gl, gb:
+                            pc.NE2001ScatTable().lookup(gl, gb))
+
+
+def calc_pixel_radec(frbs):
+    """Calculate the directions of FRBs within their sky pixels.
+
+    Sources are spread through their pixels following a low-discrepancy
+    sequence over their indices, so each source keeps its direction however
+    the FRBs have been masked.
+
+    Args:
+        frbs (FRBs): FRBs with sky pixels, indices and pixel offsets.
+
+    Returns:
+        tuple: RA, Dec arrays [frac deg]
+
+    """
+    n_dec, offset_ra, offset_dec = frbs.pix_jitter
+    index = frbs.index.astype(np.float64)
+    u_ra = (offset_ra + index*R2_STEPS[0]) % 1
+    u_dec = (offset_dec + index*R2_STEPS[1]) % 1
+    return get_sky(n_dec).pix_to_radec(frbs.pix, u_ra, u_dec)
@@ -6,6 +6,7 @@ import pandas as pd
 
 import frbpoppy.galacticops as go
 import frbpoppy.pointings as pointings
+import frbpoppy.precalc as pc
 from frbpoppy.paths import paths
 import frbpoppy.beam_dists as bd
 
@@ -34,6 +35,7 @@ class Survey:
         self.beam_size = None
         self.beam_array = None
         self.pointings = None
+        self.pixel_maps = {}
 
         # Parse survey file
         self.read_survey_parameters()
@@ -102,6 +104,18 @@ class Survey:
         self.gb_min = survey['minimum Galactic latitude (deg)']
         self.gb_max = survey['maximum Galactic latitude (deg)']
 
+    def region_limits(self):
+        """Get the limits of the survey region.
+
+        Returns:
+            dict: Minimum and maximum RA, Dec, Galactic longitude and latitude
+
+        """
+        return {'ra_min': self.ra_min, 'ra_max': self.ra_max,
+                'dec_min': self.dec_min, 'dec_max': self.dec_max,
+                'gl_min': self.gl_min, 'gl_max': self.gl_max,
+                'gb_min': self.gb_min, 'gb_max': self.gb_max}
+
     def in_region(self, ra, dec, gl, gb):
         """
         Check if the given frbs are within the survey region.
@@ -114,14 +128,30 @@ class Survey:
 
         """
         # Create mask with False if not in region
-        mask = go.in_region(ra, dec, gl, gb,
-                            ra_min=self.ra_min, ra_max=self.ra_max,
-                            dec_min=self.dec_min, dec_max=self.dec_max,
-                            gl_min=self.gl_min, gl_max=self.gl_max,
-                            gb_min=self.gb_min, gb_max=self.gb_max)
+        mask = go.in_region(ra, dec, gl, gb, **self.region_limits())
 
         return mask
 
+    def calc_pixel_maps(self, sky):
+        """Calculate direction-dependent survey properties per sky pixel.
+
+        Args:
+            sky (SkyPixels): Sky pixelization.
+
+        Returns:
+            dict: Whether in the survey region, sky and system temperature
+                [K] per pixel
+
+        """
+        if sky.n_dec not in self.pixel_maps:
+            ra, dec, gl, gb = sky.centres()
+            T_sky, T_sys = self.calc_Ts(gl, gb)
+            self.pixel_maps[sky.n_dec] = {
+                'in_region': self.in_region(ra, dec, gl.copy(), gb),
+                'T_sky': np.broadcast_to(T_sky, ra.shape).astype(np.float32),
+                'T_sys': np.broadcast_to(T_sys, ra.shape).astype(np.float32)}
+        return self.pixel_maps[sky.n_dec]
+
     def set_pointings(self, mount_type='tracking', n_pointings=None, ra=None,
                       dec=None):
         """Set pointing properties."""
@@ -200,14 +230,15 @@ class Survey:
             # will have an intensity of zero.
             self.max_offset = go.calc_sky_radius(self.beam_size)
 
-        self.beam_func_oneoffs = lambda x: bd.int_pro_random(
+        self.beam_func_oneoffs = lambda x, rng=None: bd.int_pro_random(
                                  shape=x,
                                  fwhm=self.fwhm,
                                  pattern=self.beam_pattern,
                                  max_offset=self.max_offset,
                                  central_freq=self.central_freq,
                                  beam_array=self.beam_array,
-                                 pixel_scale=self.pixel_scale)
+                                 pixel_scale=self.pixel_scale,
+                                 rng=rng)
 
         def int_pro(ra, dec, ra_p, dec_p, lst):
             return bd.int_pro_fixed(ra, dec, ra_p, dec_p, lst,
@@ -220,7 +251,7 @@ class Survey:
         self.beam_func_rep = int_pro
 
     def calc_beam(self, repeaters=False, shape=None, ra=None, dec=None,
-                  ra_p=None, dec_p=None, lst=None):
+                  ra_p=None, dec_p=None, lst=None, rng=None):
         """Calculate intensity profile."""
         if not repeaters and self.beam_pattern in ('airy', 'gaussian'):
             # What should the maximum radius of the beam be?
@@ -234,7 +265,7 @@ class Survey:
             self.beam_size = self.beam_size_array
 
         if not repeaters:
-            return self.beam_func_oneoffs(shape)
+            return self.beam_func_oneoffs(shape, rng=rng)
         else:
             return self.beam_func_rep(ra, dec, ra_p, dec_p, lst)
 
@@ -255,20 +286,22 @@ class Survey:
         """
         return 8.297616e6 * self.bw_chan * dm * (self.central_freq)**-3
 
-    def calc_scat(self, dm):
+    def calc_scat(self, dm, rng=None):
         """Calculate scattering timescale for FRBs.
 
         Offset according to Lorimer et al. (doi:10.1093/mnrasl/slt098)
 
         Args:
             dm (array): Dispersion Measure
+            rng (Generator): Random number generator
 
         Returns:
             array: Scattering timescales [ms]
 
         """
         freq = self.central_freq
-        return go.scatter_bhat(dm, scindex=-3.86, offset=-9.5, freq=freq)
+        return go.scatter_bhat(dm, scindex=-3.86, offset=-9.5, freq=freq,
+                               rng=rng)
 
     def calc_Ts(self, gl, gb):
         """Set temperatures for frbs.
@@ -309,7 +342,7 @@ class Survey:
             array: Sky temperature [K]
 
         """
-        T_sky_list = go.load_T_sky()
+        T_sky_map = go.load_T_sky()
 
         # ensure l is in range 0 -> 360
         B = gb
@@ -325,7 +358,7 @@ class Survey:
         i = nl / 4.
 
         index = 180*i.astype(int) + j.astype(int)
-        T_sky_haslam = np.take(T_sky_list, index).astype(np.float32)
+        T_sky_haslam = T_sky_map[index]
 
         # scale temperature
         # Assuming dominated by syncrotron radiation
@@ -487,7 +520,7 @@ class Survey:
         elif s_peak.ndim == 1:
             return s_peak[:, None] * w_eff
 
-    def calc_scint(self, t_scat, dist_co, gl, gb, snr):
+    def calc_scint(self, t_scat, dist_co, gl, gb, snr, rng=None, sm=None):
         """
         Calculate scintillation effect on the signal to noise ratio.
 
@@ -503,6 +536,10 @@ class Survey:
             gl (array): Galactic longitude [deg]
             gb (array): Galactic latitude [deg]
             snr (array): Signal to Noise array to modify
+            rng (Generator): Random number generator
+            sm (tuple): Scattering measure and its distance weighted
+                counterpart through the full Milky Way. Defaults to looking
+                these up from gl and gb.
 
         Returns:
             array: Signal to noise ratio modulation factors for scintillation
@@ -537,17 +574,30 @@ class Survey:
         # Taking the average kappa value
         kappa = 0.15
 
-        t_diss, decorr_bw = go.ne2001_scint_time_bw(dist_co,
-                                                    gl,
-                                                    gb,
-                                                    self.central_freq)
+        # Scattering measures through the full Milky Way are tabulated
+        if sm is None:
+            sm = pc.NE2001ScatTable().lookup(gl, gb)
+        sm, smtau = sm
+        dist = np.minimum(dist_co*1e6, 100)  # [kpc]
+
+        # Sources within the NE2001 cut need an individual calculation
+        near = (dist < 100)
+        if np.any(near):
+            sm, smtau = sm.astype(np.float64), smtau.astype(np.float64)
+            sm[near], smtau[near] = go.ne2001_get_smtau(dist[near], gl[near],
+                                                        gb[near])
+
+        t_diss, decorr_bw = go.sm_to_scint_time_bw(sm, smtau, dist,
+                                                   self.central_freq)
 
         # Following Cordes and Lazio (1991) (eq. 4.43)
         n_t = np.ones_like(t_diss)
-        n_t[~np.isnan(t_diss)] = 1 + kappa * self.t_obs / t_diss
+        ok = ~np.isnan(t_diss)
+        n_t[ok] = 1 + kappa * self.t_obs / t_diss[ok]
 
         n_f = np.ones_like(decorr_bw)
-        n_f[~np.isnan(decorr_bw)] = 1 + kappa * self.bw / decorr_bw
+        ok = ~np.isnan(decorr_bw)
+        n_f[ok] = 1 + kappa * self.bw / decorr_bw[ok]
 
         # Diffractive scintillation (eq. 4.41)
         m_diss = 1 / np.sqrt(n_t * n_f)
@@ -557,10 +607,42 @@ class Survey:
         m[weak] = np.sqrt(m_diss**2 + m_riss**2 + m_diss*m_riss)
 
         # Distribute the scintillation according to gaussian distribution
-        snr = np.random.normal(snr, m*snr)
+        snr = np.random.default_rng(rng).normal(snr, m*snr)
 
         return snr
 
+    def calc_lum_limit(self, si, z, dist_co, w_arr, f_low=100e6,
+                       f_high=10e9):
+        """Calculate the lowest bolometric luminosity which could be detected.
+
+        Assumes the best case for each source: observed at the peak of the
+        beam, without sky temperature, dispersion smearing or scattering.
+        Gains through scintillation are not taken into account.
+
+        Args:
+            si (array): Spectral index
+            z (array): Redshift
+            dist_co (array): Comoving distance [Gpc]
+            w_arr (array): Pulse width at Earth [ms]
+            f_low (float): Source emission lower frequency limit [Hz].
+            f_high (float): Source emission higher frequency limit [Hz].
+
+        Returns:
+            array: Minimum bolometric luminosity [ergs/s]
+
+        """
+        lum_ref = 1e40  # Keep peak flux densities within float32 range
+        lum = np.full(np.shape(z), lum_ref)
+        w_eff = self.calc_w_eff(w_arr, 0, 0)
+        s_peak = self.calc_s_peak(si, lum, z, dist_co, w_arr, w_eff,
+                                  f_low=f_low, f_high=f_high)
+
+        if self.beam_array is not None:
+            s_peak = s_peak * np.max(self.beam_array)
+
+        snr = self.calc_snr(s_peak.astype(np.float64), w_arr, self.T_rec)
+        return lum_ref*self.snr_limit/snr
+
     def calc_fluence_limit(self, w_eff=None):
         """Calculate the fluence limit.
 
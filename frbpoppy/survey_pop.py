@@ -5,6 +5,7 @@ import numpy as np
 
 from frbpoppy.misc import pprint
 from frbpoppy.population import Population
+from frbpoppy.ragged import Ragged
 from frbpoppy.rates import Rates
 
 
@@ -12,7 +13,7 @@ class SurveyPopulation(Population):
     """Class to create a survey population of FRBs."""
 
     def __init__(self, cosmic_pop, survey, scat=False, scin=False,
-                 mute=False, scale_by_area=True):
+                 mute=False, scale_by_area=True, seed=None):
         """
         Run a survey to detect FRB sources.
 
@@ -26,6 +27,9 @@ class SurveyPopulation(Population):
             mute (bool): Whether to suppress printing to terminal
             scale_by_area (bool): Whether to scale detection rates to the sky
                 area visible to a survey. Only relevant for one-offs.
+            seed (int/SeedSequence): Seed for the random stream of the
+                survey. Defaults to a stream derived from the seed of the
+                cosmic population, so surveying is reproducible alongside it.
         """
         if not mute:
             pprint(f'Surveying {cosmic_pop.name} with {survey.name}')
@@ -34,7 +38,7 @@ class SurveyPopulation(Population):
 
         # Check whether CosmicPopulation has been generated
         try:
-            if cosmic_pop.frbs.ra is None:
+            if cosmic_pop.frbs.index is None:
                 m = 'You may have forgotten to generate your CosmicPopulation'
                 raise ValueError(m)
         except AttributeError:
@@ -58,6 +62,11 @@ class SurveyPopulation(Population):
         self.survey = survey
         self.scale_by_area = scale_by_area
 
+        # Random stream with which to survey
+        if seed is None and hasattr(cosmic_pop, 'sub_seed'):
+            seed = cosmic_pop.sub_seed(1)
+        self.rng = np.random.default_rng(seed)
+
         # Set survey attributes if not available
         if survey.n_days is None:
             survey.n_days = self.n_days
@@ -81,8 +90,18 @@ class SurveyPopulation(Population):
             br.late += br.tot - np.sum(self.n_brst_pr_src)
             sr.late += sr.tot - len(self.n_brst_pr_src)
 
+        # Direction-dependent values can be looked up per sky pixel
+        self.sky = getattr(cosmic_pop, 'sky', None)
+        pix_maps = None
+        if self.sky is not None and frbs.pix is not None:
+            pix_maps = survey.calc_pixel_maps(self.sky)
+
         # Check whether source is in region
-        region_mask = survey.in_region(frbs.ra, frbs.dec, frbs.gl, frbs.gb)
+        if pix_maps is not None:
+            region_mask = pix_maps['in_region'][frbs.pix]
+        else:
+            region_mask = survey.in_region(frbs.ra, frbs.dec, frbs.gl,
+                                           frbs.gb)
         frbs.apply(region_mask)
 
         # Keep track of detection numbers
@@ -91,15 +110,28 @@ class SurveyPopulation(Population):
             br.out = np.sum(self.n_brst_pr_src[~region_mask])
             self.n_brst_pr_src = self.n_brst_pr_src[region_mask]
 
+        # Account for sources never generated outside the sampled sky
+        f_sky = getattr(cosmic_pop, 'f_sky', 1)
+        if f_sky < 1:
+            sr.out += sr.tot*(1/f_sky - 1)
+            sr.tot /= f_sky
+            if self.repeaters:
+                br.out += br.tot*(1/f_sky - 1)
+                br.tot /= f_sky
+
         # Calculate dispersion measure across single channel
         frbs.t_dm = survey.calc_dm_smear(frbs.dm)
 
         # Set scattering timescale
         if scat:
-            frbs.t_scat = survey.calc_scat(frbs.dm)
+            frbs.t_scat = survey.calc_scat(frbs.dm, rng=self.rng)
 
         # Calculate total temperature
-        frbs.T_sky, frbs.T_sys = survey.calc_Ts(frbs.gl, frbs.gb)
+        if pix_maps is not None:
+            frbs.T_sky = pix_maps['T_sky'][frbs.pix]
+            frbs.T_sys = pix_maps['T_sys'][frbs.pix]
+        else:
+            frbs.T_sky, frbs.T_sys = survey.calc_Ts(frbs.gl, frbs.gb)
 
         # Calculate effective pulse width
         frbs.w_eff = survey.calc_w_eff(frbs.w_arr, frbs.t_dm, frbs.t_scat)
@@ -114,6 +146,11 @@ class SurveyPopulation(Population):
                                          f_low=cosmic_pop.f_min,
                                          f_high=cosmic_pop.f_max)
 
+        # Beam intensities differ per burst, so repeaters need a peak flux
+        # density per burst
+        if self.repeaters and frbs.s_peak.ndim == 1:
+            frbs.s_peak = frbs.per_burst('s_peak').copy()
+
         # Calculations differ whether dealing with repeaters or not
         if self.repeaters:
             self.det_repeaters()
@@ -122,6 +159,22 @@ class SurveyPopulation(Population):
 
         # Prevent additional memory usage
         self.survey = None
+        self.sky = None
+
+    def pixel_sm(self, ix=slice(None)):
+        """Look up Milky Way scattering measures per sky pixel if possible.
+
+        Args:
+            ix (array): Indices of the FRBs for which to look them up.
+
+        Returns:
+            tuple: Scattering measures, or None without sky pixels
+
+        """
+        if self.sky is None or self.frbs.pix is None:
+            return None
+        pix = self.frbs.pix[ix]
+        return tuple(m[pix] for m in self.sky.ne2001_sm())
 
     def det_oneoffs(self):
         """Detect one-off frbs."""
@@ -129,7 +182,8 @@ class SurveyPopulation(Population):
         survey = self.survey
 
         # Account for beam offset
-        int_pro, offset = survey.calc_beam(shape=frbs.s_peak.shape)
+        int_pro, offset = survey.calc_beam(shape=frbs.s_peak.shape,
+                                           rng=self.rng)
         frbs.s_peak *= int_pro
         frbs.offset = offset  # [deg]
 
@@ -144,25 +198,27 @@ class SurveyPopulation(Population):
 
             # Ensure scattering has been calculated
             if not isinstance(frbs.t_scat, np.ndarray):
-                frbs.t_scat = survey.calc_scat(frbs.dm)
+                frbs.t_scat = survey.calc_scat(frbs.dm, rng=self.rng)
 
             # Calculate signal to noise ratio after scattering
             frbs.snr = survey.calc_scint(frbs.t_scat, frbs.dist_co, frbs.gl,
-                                         frbs.gb, frbs.snr)
+                                         frbs.gb, frbs.snr, rng=self.rng,
+                                         sm=self.pixel_sm())
 
         # Check whether frbs would be above detection threshold
         snr_mask = (frbs.snr >= survey.snr_limit)
+        self.source_rate.faint = count(~snr_mask, frbs.weight)
+        if frbs.weight is not None:
+            # Sources never drawn below the flux limit were too faint
+            self.source_rate.faint += np.sum(1 - frbs.weight)
         frbs.apply(snr_mask)
-        self.source_rate.faint = len(snr_mask) - np.count_nonzero(snr_mask)
 
         # Distant frbs are redshifted out of your observing time
         limit = 1/(1+frbs.z)
-        rate_mask = np.random.random(len(frbs.z)) <= limit
+        rate_mask = self.rng.random(len(frbs.z)) <= limit
+        self.source_rate.late = count(~rate_mask, frbs.weight)
+        self.source_rate.det = count(rate_mask, frbs.weight)
         frbs.apply(rate_mask)
-        self.source_rate.late = np.size(rate_mask)
-        self.source_rate.late -= np.count_nonzero(rate_mask)
-
-        self.source_rate.det = len(frbs.snr)
 
         # Calculate detection rates
         if self.scale_by_area:
@@ -185,7 +241,7 @@ class SurveyPopulation(Population):
         max_t = survey.n_days
         times = np.arange(0, max_t+t_obs, t_obs)  # [days]
         lsts = times*360*(24/23.9344696) % 360  # Local sidereal time [deg]
-        lsts += np.random.uniform(0, 360)  # Add random offset
+        lsts += self.rng.uniform(0, 360)  # Add random offset
 
         # Only keep bursts within survey time
         time_mask = (frbs.time <= times[-1])
@@ -200,13 +256,8 @@ class SurveyPopulation(Population):
         max_n_pointings = len(times) - 1
 
         # Initialize some necessary arrays
-        if frbs.w_eff.ndim == 2 or frbs.lum_bol.ndim == 2:
-            sim_shape = frbs.time  # 2D
-        else:
-            sim_shape = frbs.lum_bol  # 1D
-
-        frbs.fluence = np.full_like(sim_shape, np.nan)
-        frbs.snr = np.full_like(sim_shape, np.nan)
+        frbs.fluence = np.full_like(frbs.time, np.nan)
+        frbs.snr = np.full_like(frbs.time, np.nan)
 
         # Have to loop over the observing times
         ra_p = survey.pointings[0]
@@ -273,82 +324,43 @@ class SurveyPopulation(Population):
         # Time & not position
         tnp_ix = (t_ix[0][~p_ix], t_ix[1][~p_ix])
 
-        # Number of bursts per source
-        tp_unique, n_bursts = np.unique(tp_ix[0], return_counts=True)
+        # Sources with bursts in time & position
+        tp_unique = np.unique(tp_ix[0])
 
         # Add to outside of pointing count
         self.burst_rate.pointing += len(tnp_ix[0])
         self.srcs_not_in_pointing[tp_unique] = False
 
-        # Ensure relevant masks
-        s_peak_ix = tp_unique
-        not_ix = np.unique(tnp_ix[0])
-        int_pro = int_pro[p_ix]
-
-        if frbs.s_peak.ndim == 2:
-            s_peak_ix = tp_ix
-            not_ix = tnp_ix
-        if frbs.s_peak.ndim == 1:
-            int_pro = int_pro[tp_unique]
-
         # Apply intensities to those bursts' s_peak
-        frbs.s_peak[s_peak_ix] *= int_pro
-        frbs.s_peak[not_ix] = np.nan
+        frbs.s_peak[tp_ix] *= int_pro[p_ix]
+        frbs.s_peak[tnp_ix] = np.nan
 
-        w_eff_ix = tp_unique
-        if frbs.w_eff.ndim == 2:
-            w_eff_ix = tp_ix
-
-        # Ensure dimensionality is correct
-        s_peak = frbs.s_peak[s_peak_ix]
-        w_eff = frbs.w_eff[w_eff_ix]
-        if frbs.w_eff.ndim < frbs.s_peak.ndim:
-            w_eff = np.repeat(w_eff, n_bursts)
-        elif frbs.w_eff.ndim > frbs.s_peak.ndim:
-            s_peak = np.repeat(s_peak, n_bursts)
+        # Gather source properties for each burst rather than repeating them
+        s_peak = frbs.s_peak[tp_ix]
+        w_eff = frbs.at_bursts('w_eff', tp_ix)
+        w_arr = frbs.at_bursts('w_arr', tp_ix)
+        T_sys = frbs.at_bursts('T_sys', tp_ix)
 
         # Calculate fluence [Jy*ms]
-        frbs.fluence[s_peak_ix] = survey.calc_fluence(s_peak, w_eff)
-
-        # Construct masks with correct dimension
-        if frbs.w_arr.ndim == 2:
-            w_arr = frbs.w_arr[tp_ix]
-        elif frbs.w_arr.ndim == 1:
-            w_arr = frbs.w_arr[tp_unique]
-
-        # Ensure entries are repeated for the number of bursts
-        s_peak = frbs.s_peak[s_peak_ix]
-        if frbs.w_arr.ndim < frbs.s_peak.ndim:
-            w_arr = np.repeat(w_arr, n_bursts)
-        elif frbs.w_arr.ndim > frbs.s_peak.ndim:
-            s_peak = np.repeat(s_peak, n_bursts)
-
-        # And system temperatures
-        if frbs.T_sys.ndim == 1:
-            if frbs.s_peak.ndim == 2:
-                T_sys = np.repeat(frbs.T_sys[tp_unique], n_bursts)
-            elif frbs.s_peak.ndim == 1:
-                T_sys = frbs.T_sys[tp_unique]
-        elif frbs.T_sys.ndim == 0:
-            T_sys = frbs.T_sys
+        frbs.fluence[tp_ix] = survey.calc_fluence(s_peak, w_eff)
 
         # Caculate Signal to Noise Ratio
-        frbs.snr[s_peak_ix] = survey.calc_snr(s_peak, w_arr, T_sys)
+        frbs.snr[tp_ix] = survey.calc_snr(s_peak, w_arr, T_sys)
 
         # Add scintillation
         if self.scin:
             # Not been fully tested with repeaters
-            # Might break due to differing dimensionality of dist and snr
-            t_scat = frbs.t_scat[tp_unique]
-            dist_co = frbs.dist_co[tp_unique]
-            gl = frbs.gl[tp_unique]
-            gb = frbs.gb[tp_unique]
-            snr = frbs.snr[s_peak_ix]
-            new_snr = survey.calc_scint(t_scat, dist_co, gl, gb, snr)
-            frbs.snr[s_peak_ix] = np.repeat(new_snr, n_bursts)
+            t_scat = frbs.at_bursts('t_scat', tp_ix)
+            dist_co = frbs.at_bursts('dist_co', tp_ix)
+            gl = frbs.at_bursts('gl', tp_ix)
+            gb = frbs.at_bursts('gb', tp_ix)
+            snr = frbs.snr[tp_ix]
+            sm = self.pixel_sm(tp_ix[0])
+            frbs.snr[tp_ix] = survey.calc_scint(t_scat, dist_co, gl, gb, snr,
+                                                rng=self.rng, sm=sm)
 
         # Only keep those in time, in position and above the snr limit
-        snr_m = (frbs.snr[s_peak_ix] > survey.snr_limit)
+        snr_m = (frbs.snr[tp_ix] > survey.snr_limit)
         s_peak_ix = (tp_ix[0][snr_m], tp_ix[1][snr_m])
 
         self.burst_rate.faint += len(tp_ix[0]) - len(s_peak_ix[0])
@@ -386,8 +398,23 @@ class SurveyPopulation(Population):
             self.source_rate.scale_by_area()
 
 
+def count(mask, weight=None):
+    """Count the sources in a mask, each counting for its weight if given."""
+    if weight is None:
+        return np.count_nonzero(mask)
+    return np.sum(weight[mask])
+
+
 def fast_where(a, min_v, max_v):
-    """Faster implementation of np.where(((a >= min_v) & (a <= max_v)))."""
+    """Faster implementation of np.where(((a >= min_v) & (a <= max_v))).
+
+    For Ragged arrays, returns source indices and indices into the flat
+    burst values.
+    """
+    if isinstance(a, Ragged):
+        flat = np.flatnonzero((a.values >= min_v) & (a.values <= max_v))
+        return a.rows()[flat], flat
+
     left = np.apply_along_axis(np.searchsorted, 1, a, min_v)
     right = np.apply_along_axis(np.searchsorted, 1, a, max_v)
     unique_rows = np.where(left <= right)[0]
@@ -2,21 +2,25 @@
 import numpy as np
 from scipy.special import gamma
 
+from frbpoppy.ragged import Ragged
 
-def single(n_srcs=1, n_days=1, z=0):
+
+def single(n_srcs=1, n_days=1, z=0, rng=None):
     """Generate a series of one-off burst times.
 
     Args:
         n_srcs (int): Number of sources
         n_days (int): Number of days
         z (array): Redshift of sources
+        rng (Generator): Random number generator. Defaults to a new one.
     """
-    time = np.random.uniform(0, n_days, n_srcs).astype(np.float32)
+    rng = np.random.default_rng(rng)
+    time = rng.uniform(0, n_days, n_srcs).astype(np.float32)
     time *= (1+z)
     return time[:, np.newaxis]
 
 
-def regular(rate=2, n_srcs=1, n_days=1, z=0):
+def regular(rate=2, n_srcs=1, n_days=1, z=0, rng=None):
     """Generate a series of regular spaced burst times.
 
     Args:
@@ -24,6 +28,7 @@ def regular(rate=2, n_srcs=1, n_days=1, z=0):
         n_srcs (int): Number of sources
         n_days (int): Number of days
         z (array): Redshift of sources
+        rng (Generator): Unused, regular bursts involve no randomness
     """
     time_range = np.arange(0, n_days, step=1/rate, dtype=np.float32)
 
@@ -37,8 +42,8 @@ def regular(rate=2, n_srcs=1, n_days=1, z=0):
     return time
 
 
-def cyclic(rate=2, n_days=1, n_srcs=1, period=1, frac=.1, z=0):
-    """Generate a series of uniform burst times within an activity cycle."
+def cyclic(rate=2, n_days=1, n_srcs=1, period=1, frac=.1, z=0, rng=None):
+    """Generate a series of uniform burst times within an activity cycle.
 
     Args:
         rate (float/array): Number of events per day
@@ -47,64 +52,106 @@ def cyclic(rate=2, n_days=1, n_srcs=1, period=1, frac=.1, z=0):
         period (float/array): Period of activity cycle (days)
         frac (float/array): Fraction of activity cycle a source is active
         z (float/array): Redshift of sources
+        rng (Generator): Random number generator. Defaults to a new one.
+
+    Returns:
+        Ragged: Sorted burst times per source [days]
+
     """
-    # ensure arguments that may be floats or arrays are arrays (length is number of sources)
-    rate = np.atleast_1d(rate)
-    period = np.atleast_1d(period)
-    frac = np.atleast_1d(frac)
-    z = np.atleast_1d(z)
+    rng = np.random.default_rng(rng)
 
-    # get number of bursts to generate for each source
-    nburst_per_cycle = (rate * frac * period).astype(int)
-    nburst_per_source_max = ((n_days / period) * nburst_per_cycle).astype(int).max()
+    # Arguments may be floats or arrays with a value per source
+    rate, period, frac, z = (np.broadcast_to(p, (n_srcs, ))
+                             for p in (rate, period, frac, z))
 
-    # generate burst arrival times within each active period
-    times = np.random.uniform(0, frac[:, np.newaxis] * period[:, np.newaxis],
-                              (n_srcs, nburst_per_source_max)).astype(np.float32)
+    # Number of bursts per activity cycle, for all cycles starting in time
+    per_cycle = (rate * frac * period).astype(np.int64)
+    n_cycles = np.ceil(n_days / period).astype(np.int64)
+    counts = per_cycle * n_cycles
 
-    # need to add jump when going to next cycle
-    for src_ind in range(n_srcs):
-        times += (np.arange(nburst_per_source_max) // nburst_per_cycle[src_ind]) * period[src_ind]
+    # Source and activity cycle of each burst
+    rows = np.repeat(np.arange(n_srcs), counts)
+    starts = np.cumsum(counts) - counts
+    cycle = (np.arange(rows.size) - starts[rows]) // per_cycle[rows]
 
-    # sort arrival times per source
-    times.sort(axis=1)
+    # Place bursts in order within the active part of their cycle
+    u = sorted_uniform(np.repeat(per_cycle, n_cycles), rng=rng)
+    time = period[rows] * (cycle + frac[rows]*u)
 
-    # Add redshift
-    if nburst_per_source_max > 0:
-        t0 = times[:, 0][:, np.newaxis]
-        times -= t0
-        times *= (1+z)[:, np.newaxis]
-        times += t0
+    # Add redshift, stretching the time since the first burst
+    first = time[starts[rows]]
+    time = first + (time - first)*(1+z[rows])
 
     # Remove bursts past n_days
-    times[(times > n_days)] = np.nan
-
-    return times
+    time = Ragged.from_counts(time.astype(np.float32), counts)
+    return time[time <= n_days]
 
 
-def poisson(**kwargs):
+def poisson(rate=0.1, n_srcs=1, n_days=1, z=0, rng=None):
     """Generate a series of poisson times.
 
-    Wrapper to iteratively generate from _poisson_dist
+    The number of bursts of each source is drawn first, after which their
+    times are placed uniformly within the observing time. Both take time
+    linear in the number of bursts.
 
     Args:
-        Kwargs from iteratively_gen_times
+        rate (float/array): Expected number of events per day
+        n_srcs (int): Number of sources
+        n_days (int): Number of days
+        z (float/array): Redshift of sources
+        rng (Generator): Random number generator. Defaults to a new one.
+
+    Returns:
+        Ragged: Sorted burst times per source [days]
+
     """
-    # Set distribution from which to draw
-    return iteratively_gen_times(_poisson_dist, **kwargs)
+    rng = np.random.default_rng(rng)
 
+    # Time dilation lowers the rate seen from Earth
+    n_exp = np.broadcast_to(rate*n_days/(1+z), (n_srcs, ))
+    counts = rng.poisson(n_exp)
+    return Ragged.from_counts(sorted_uniform(counts, n_days, rng=rng),
+                              counts)
 
-def _poisson_dist(dims, rate=0.1):
-    """Draw values from a poissonian distribution.
+
+def sorted_uniform(counts, high=1, rng=None):
+    """Draw sorted uniform values in groups without sorting.
+
+    Uses the gaps between sorted uniform values following the same
+    exponential distribution, with one more gap up to the maximum value.
 
     Args:
-        rate (float): Expected number of events per day.
+        counts (array): Number of values per group
+        high (float): Maximum value
+        rng (Generator): Random number generator. Defaults to a new one.
+
+    Returns:
+        array: Values of all groups, each sorted from low to high
+
     """
-    if not isinstance(rate, np.ndarray):
-        return np.random.exponential(1/rate, dims).astype(np.float32)
-    else:  # Allow for an array of lambdas
-        dims = dims[::-1]
-        return np.random.exponential(1/rate, dims).astype(np.float32).T
+    rng = np.random.default_rng(rng)
+    counts = np.asarray(counts, dtype=np.int64)
+    n_groups = counts.size
+
+    if not n_groups:
+        return np.zeros(0, dtype=np.float32)
+
+    # Index of the first gap and of the gap closing off each group
+    ends = np.cumsum(counts + 1) - 1
+    firsts = ends - counts
+    gaps = rng.standard_exponential(ends[-1] + 1)
+    totals = np.add.reduceat(gaps, firsts)
+
+    # Take off the total of the previous group before summing the gaps, so
+    # the running total restarts for each group instead of growing with the
+    # number of values drawn before it
+    gaps[firsts[1:]] -= totals[:-1]
+    values = np.delete(np.cumsum(gaps), ends)
+
+    # Fraction of the total gap length of each group before a value
+    groups = np.repeat(np.arange(n_groups), counts)
+    values *= high/totals[groups]
+    return values.astype(np.float32)
 
 
 def clustered(**kwargs):
@@ -118,22 +165,25 @@ def clustered(**kwargs):
     return iteratively_gen_times(_weibull_dist, **kwargs)
 
 
-def _weibull_dist(dims, r=5.7, k=0.34):
+def _weibull_dist(dims, r=5.7, k=0.34, rng=None):
     """Generate burst times following a Weibull distribution.
 
     Args:
         r (float): Rate parameter
         k (float): Shape parameter
+        rng (Generator): Random number generator. Defaults to a new one.
     """
+    rng = np.random.default_rng(rng)
     lam = 1/(r*gamma(1 + 1/k))
     if not any([isinstance(p, np.ndarray) for p in (r, k)]):
-        return lam*np.random.weibull(k, dims).astype(np.float32)
+        return lam*rng.weibull(k, dims).astype(np.float32)
     else:  # Allow for an array for r's
         dims = dims[::-1]
-        return (lam*np.random.weibull(k, dims).astype(np.float32)).T
+        return (lam*rng.weibull(k, dims).astype(np.float32)).T
 
 
-def iteratively_gen_times(dist, n_srcs=1, n_days=1, z=0, **kwargs):
+def iteratively_gen_times(dist, n_srcs=1, n_days=1, z=0, rng=None,
+                          **kwargs):
     """Generate burst times in an iterative manner using a distribution.
 
     Args:
@@ -141,12 +191,15 @@ def iteratively_gen_times(dist, n_srcs=1, n_days=1, z=0, **kwargs):
         n_srcs (int): Number of sources
         n_days (int): Number of days
         z (array): Redshift of sources
+        rng (Generator): Random number generator. Defaults to a new one.
     """
+    rng = np.random.default_rng(rng)
+
     # Determine the maximum possible number of bursts per source to include
     log_size = 1
     m = int(10**log_size)
     dims = (n_srcs, m)
-    time = dist(dims, **kwargs)
+    time = dist(dims, rng=rng, **kwargs)
 
     # Converting intervals to time stamps
     time = np.cumsum(time, axis=1)  # This is in fraction of days
@@ -173,7 +226,7 @@ def iteratively_gen_times(dist, n_srcs=1, n_days=1, z=0, **kwargs):
             if isinstance(value, np.ndarray) and sum_mask != dims[0]:
                 new_kwargs[kw] = kwargs[kw][mask]
 
-        new = dist((sum_mask, m), **new_kwargs)
+        new = dist((sum_mask, m), rng=rng, **new_kwargs)
         new = np.cumsum(new, axis=1)
 
         # Add redshift correction
@@ -27,13 +27,13 @@ def calc_w_arr(w_int, z=0):
         return w_int*(1+z[:, None])
 
 
-def constant(value=1., shape=1, z=0):
+def constant(value=1., shape=1, z=0, rng=None):
     """Generate pulse widths at a constant value."""
     w_int = np.full(shape, value).astype(np.float32)
     return w_int, calc_w_arr(w_int, z=z)
 
 
-def uniform(low=0, high=10, shape=1, z=0):
+def uniform(low=0, high=10, shape=1, z=0, rng=None):
     """Generate pulse widths from a uniform distribution.
 
     Args:
@@ -41,17 +41,19 @@ def uniform(low=0, high=10, shape=1, z=0):
         high (float): Maximum pulse width [ms]
         shape (tuple): Required array shape
         z (array): Redshift of pulses
+        rng (Generator): Random number generator. Defaults to a new one.
 
     Returns:
         type: Description of returned object.
 
     """
-    w_int = np.random.uniform(low, high, shape).astype(np.float32)
+    rng = np.random.default_rng(rng)
+    w_int = rng.uniform(low, high, shape).astype(np.float32)
     w_arr = calc_w_arr(w_int, z=z)
     return w_int, w_arr
 
 
-def gauss(mean=1, std=2, shape=1, z=0):
+def gauss(mean=1, std=2, shape=1, z=0, rng=None):
     """Generate pulse widths from a Gaussian/Normal distribution.
 
     Args:
@@ -59,43 +61,46 @@ def gauss(mean=1, std=2, shape=1, z=0):
         std (float): Standard deviation of the pulse widths [ms]
         shape (tuple): Required array shape
         z (array): Redshift of pulses
+        rng (Generator): Random number generator. Defaults to a new one.
 
     Returns:
         tuple: intrinsic pulse widths, pulse widths at Earth
 
     """
-    w_int = gd.trunc_norm(mean, std, shape).astype(np.float32)
+    w_int = gd.trunc_norm(mean, std, shape, rng=rng).astype(np.float32)
     w_arr = calc_w_arr(w_int, z=z)
     return w_int, w_arr
 
 
-def log10normal(mean=0.1, std=0.5, shape=1, z=0):
+def log10normal(mean=0.1, std=0.5, shape=1, z=0, rng=None):
     """Draw burst from log10normal distribution.
 
     Args:
         shape (tuple): Required array shape
         z (array): Redshift of pulses
+        rng (Generator): Random number generator. Defaults to a new one.
 
     Returns:
         type: Description of returned object.
 
     """
-    w_int = gd.log10normal(mean, std, shape).astype(np.float32)
+    w_int = gd.log10normal(mean, std, shape, rng=rng).astype(np.float32)
     w_arr = calc_w_arr(w_int, z=z)
     return w_int, w_arr
 
 
-def lognormal(mean=0.1, std=0.5, shape=1, z=0):
+def lognormal(mean=0.1, std=0.5, shape=1, z=0, rng=None):
     """Draw burst from lognormal distribution.
 
     Args:
         shape (tuple): Required array shape
         z (array): Redshift of pulses
+        rng (Generator): Random number generator. Defaults to a new one.
 
     Returns:
         type: Description of returned object.
 
     """
-    w_int = gd.lognormal(mean, std, shape).astype(np.float32)
+    w_int = gd.lognormal(mean, std, shape, rng=rng).astype(np.float32)
     w_arr = calc_w_arr(w_int, z=z)
     return w_int, w_arr
@@ -58,6 +58,7 @@ class PostDevelopCommand(develop):
               loc('./data/models/ne2001/calc_xyz.o'),
               loc('./data/models/ne2001/density.o'),
               loc('./data/models/ne2001/glun.o'),
+              loc('./data/models/ne2001/batch.o'),
               ]
 
         check_call(gf)
@@ -38,11 +38,7 @@ def iter_run(i):
     s.gen_pointings()  # To ensure each sub pop has the same pointings
 
     # Only generate FRBs in CHIME's survey region
-    r.set_direction(model='uniform',
-                    min_ra=s.ra_min,
-                    max_ra=s.ra_max,
-                    min_dec=s.dec_min,
-                    max_dec=s.dec_max)
+    r.set_direction(model='footprint', surveys=[s])
 
     if LARGE_POP:
         surv_pop = LargePopulation(r, s, max_size=MAX_SIZE).pops[0]
@@ -41,11 +41,7 @@ if MAKE:
     r.set_time(model='poisson', rate=rate)
 
     # Only generate FRBs in CHIME's survey region
-    r.set_direction(model='uniform',
-                    min_ra=chime.ra_min,
-                    max_ra=chime.ra_max,
-                    min_dec=chime.dec_min,
-                    max_dec=chime.dec_max)
+    r.set_direction(model='footprint', surveys=[chime])
 
     r.generate()
 
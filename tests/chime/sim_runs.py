@@ -31,11 +31,7 @@ for n in N_SRCS:
         s.set_beam(model='chime-frb')
 
         # Only generate FRBs in CHIME's survey region
-        r.set_direction(model='uniform',
-                        min_ra=s.ra_min,
-                        max_ra=s.ra_max,
-                        min_dec=s.dec_min,
-                        max_dec=s.dec_max)
+        r.set_direction(model='footprint', surveys=[s])
 
         r.generate()
 
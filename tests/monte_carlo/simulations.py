@@ -134,21 +134,14 @@ class MonteCarlo:
 
             pop.generate()
 
-            for si in sis:
-                pop.set_si(model='constant', value=si)
-                pop.gen_si()
-
-                for li in lis:
-                    pop.set_lum(model='powerlaw',
-                                low=1e40,
-                                high=1e45, power=li)
-
-                    if not np.isnan(lum_min):
-                        pop.set_lum(model='powerlaw', low=lum_min,
-                                    high=lum_max, index=li)
-
-                    pop.gen_lum()
-
+            lum_lims = {'low': 1e40, 'high': 1e45}
+            if not np.isnan(lum_min):
+                lum_lims = {'low': lum_min, 'high': lum_max}
+
+            for si in pop.sweep('si', 'value', sis, model='constant'):
+                lums = pop.sweep('lum', 'power', lis, model='powerlaw',
+                                 **lum_lims)
+                for li in lums:
                     for survey in self.surveys:
                         surv_pop = SurveyPopulation(pop, survey)
 
@@ -225,7 +218,7 @@ class MonteCarlo:
             t_pop = deepcopy(pop)
             t_pop.set_lum(model='powerlaw', low=lum_min, high=lum_max,
                           power=li)
-            t_pop.gen_lum()
+            t_pop.regenerate()
 
             for survey in self.surveys:
                 surv_pop = SurveyPopulation(t_pop, survey)
@@ -300,7 +293,7 @@ class MonteCarlo:
             w_mean, w_std = e
             t_pop = deepcopy(pop)
             t_pop.set_w(model='lognormal', mean=w_mean, std=w_std)
-            t_pop.gen_w()
+            t_pop.regenerate()
 
             for survey in self.surveys:
                 surv_pop = SurveyPopulation(t_pop, survey)
@@ -373,11 +366,8 @@ class MonteCarlo:
             dm_igm_slope, dm_host = e
             t_pop = deepcopy(pop)
             t_pop.set_dm_igm(model='ioka', slope=dm_igm_slope)
-            t_pop.gen_dm_igm()
             t_pop.set_dm_host(model='constant', value=dm_host)
-            t_pop.gen_dm_host()
-            t_pop.frbs.dm = t_pop.frbs.dm_mw + t_pop.frbs.dm_igm
-            t_pop.frbs.dm += t_pop.frbs.dm_host
+            t_pop.regenerate()
 
             for survey in self.surveys:
                 surv_pop = SurveyPopulation(t_pop, survey)
@@ -59,14 +59,10 @@ def generate(parallel=False):
         pop.set_lum(model='powerlaw', low=1e40, high=1e45, power=-1)
         pop.generate()
 
-        for li in LIS:
-            pop.set_lum(model='powerlaw', low=1e40, high=1e45, power=li)
-            pop.gen_lum()
-
-            for si in SIS:
-                pop.set_si(model='constant', value=si)
-                pop.gen_si()
-
+        lums = pop.sweep('lum', 'power', LIS, model='powerlaw', low=1e40,
+                         high=1e45)
+        for li in lums:
+            for si in pop.sweep('si', 'value', SIS, model='constant'):
                 pop.name = f'complex_alpha_{alpha}_lum_{li}_si_{si}'
 
                 for survey in surveys:
@@ -0,0 +1,55 @@
+"""Check reductions over ragged bursts match those over padded arrays."""
+import numpy as np
+
+from frbpoppy import CosmicPopulation
+from frbpoppy.ragged import Ragged
+
+
+def test_sum_nan():
+    """A NaN burst only affects the sum of its own source."""
+    r = Ragged.from_counts([1, np.nan, 2, 3, 4], [2, 1, 2])
+    np.testing.assert_array_equal(r.sum(axis=1), [np.nan, 2, 7])
+    np.testing.assert_array_equal(np.nansum(r, axis=1), [1, 2, 7])
+
+
+def test_sum_mixed_magnitudes():
+    """Large values don't swallow small values of other sources."""
+    r = Ragged.from_counts([1e17, 1, 1, 1], [1, 3])
+    np.testing.assert_array_equal(np.sum(r, axis=1), [1e17, 3])
+
+
+def test_sum_empty_sources():
+    """Sources without bursts sum to zero, as on a NaN-free padded array."""
+    r = Ragged.from_counts([1., 2., 3.], [0, 2, 0, 1, 0])
+    np.testing.assert_array_equal(r.sum(axis=1), [0, 3, 0, 3, 0])
+    assert Ragged.from_counts([], [0, 0]).sum(axis=1).tolist() == [0, 0]
+
+
+def test_count_nonzero():
+    """Counting bursts per source matches the padded array."""
+    padded = np.array([[1, np.nan, np.nan], [np.nan] * 3, [2, 3, 4]])
+    r = Ragged.from_padded(padded)
+    np.testing.assert_array_equal(np.count_nonzero(~np.isnan(r), 1),
+                                  np.count_nonzero(~np.isnan(padded), 1))
+    np.testing.assert_array_equal((r > 1).sum(1), [0, 0, 3])
+
+
+def test_combined_distributions():
+    """Per-source distribution inputs apply to each burst of that source."""
+    np.random.seed(1)
+    pop = CosmicPopulation(50, repeaters=True, ragged=True, generate=False)
+    pop.set_dm_mw(model=lambda: np.zeros(pop.n_srcs))
+    pop.set_w('uniform', per_source='different', low=np.full(50, 1.),
+              high=np.full(50, 2.))
+    pop.set_si('gauss', per_source='different', mean=np.linspace(-2, 0, 50),
+               std=np.zeros(50))
+    pop.generate()
+
+    frbs = pop.frbs
+    assert isinstance(frbs.w_arr, Ragged)
+    z = frbs.z[frbs.time.rows()]
+    assert np.all((frbs.w_int.values >= 1) & (frbs.w_int.values <= 2))
+    np.testing.assert_allclose(frbs.w_arr.values, frbs.w_int.values*(1+z),
+                               rtol=1e-5)
+    np.testing.assert_allclose(frbs.si.values,
+                               np.linspace(-2, 0, 50)[frbs.time.rows()])